@@ -17,6 +17,9 @@ async def list_all_rooms(debug_token: str = Header(alias="X-Debug-Token")):
     verify_debug_token(debug_token)
     
     rooms = await state_store.list_rooms()
+    # Sid bindings live on the store the socket handlers use
+    from main import game_events
+    sid_store = game_events.state_store
     
     return {
         "rooms": [
@@ -24,7 +27,8 @@ async def list_all_rooms(debug_token: str = Header(alias="X-Debug-Token")):
                 "id": room.id,
                 "phase": room.phase,
                 "player_count": len(room.players),
-                "connected_players": len([p for p in room.players.values() if p.is_connected]),
+                "connected_players": room.connected_count,
+                "connected_sockets": len(sid_store.room_sids(room.id)),
                 "current_round": room.current_round.id if room.current_round else None,
                 "votes_count": len(room.current_round.votes) if room.current_round else 0,
                 "created_at": room.created_at.isoformat()
@@ -65,11 +69,10 @@ async def force_complete_round(room_id: str, debug_token: str = Header(alias="X-
         raise HTTPException(status_code=400, detail="No active round to complete")
     
     # Import here to avoid circular imports
-    from sockets.events import GameSocketEvents
-    from main import sio
+    from main import game_events
     
-    # Force complete the round
-    game_events = GameSocketEvents(sio)
+    # Force complete the round with the live handlers (constructing another
+    # GameSocketEvents would re-register every event on the server)
     await game_events._complete_round(room)
     
     return {
@@ -117,7 +120,7 @@ async def get_room_debug(room_id: str, debug_token: str = Header(alias="X-Debug-
     return {
         "room_id": room.id,
         "phase": room.phase,
-        "config": room.config.dict(),
+        "config": room.config_as_dict(),
         "database_config": db_config,
         "players": {pid: {"name": p.name, "score": p.score, "is_host": p.is_host} for pid, p in room.players.items()},
         "current_round": room.current_round.dict() if room.current_round else None,  
@@ -114,7 +114,6 @@ async def get_room(room_id: str):
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
     
-    player_names = [player.name for player in room.players.values()]
     current_speaker = None
     
     if room.current_round and room.phase == GamePhase.IN_ROUND:
@@ -124,7 +123,7 @@ async def get_room(room_id: str):
     
     return RoomState(
         roomId=room.id,
-        players=player_names,
+        players=room.player_names,
         phase=room.phase,
         config=room.config,
         currentSpeaker=current_speaker
@@ -156,7 +155,7 @@ async def update_room_config(
         raise HTTPException(status_code=400, detail="Can only change settings while waiting")
     
     # Update room configuration
-    logger.info(f"🔧 Old config: {room.config.dict()}")
+    logger.info(f"🔧 Old config: {room.config_as_dict()}")
     room.config = RoomConfig(
         mode=request.mode,
         vote_type=request.vote_type,
@@ -165,18 +164,17 @@ async def update_room_config(
         hard_mode=request.hard_mode,
         vote_timeout=room.config.vote_timeout  # Keep existing timeout
     )
-    logger.info(f"🔧 New config: {room.config.dict()}")
+    logger.info(f"🔧 New config: {room.config_as_dict()}")
     
     await state_store.update_room(room)
     
     # Notify all players about config change via socket
     from main import sio
-    player_names = [p.name for p in room.players.values()]
     room_state_data = {
         'roomId': room.id,
-        'players': player_names,
+        'players': room.player_names,
         'phase': room.phase,
-        'config': room.config.dict(),
+        'config': room.config_as_dict(),
         'currentSpeaker': None
     }
     logger.info(f"🔧 Sending room_state update: {room_state_data}")
@@ -32,6 +32,17 @@ class Settings:
     MAX_PLAYERS_PER_ROOM: int = int(os.getenv("MAX_PLAYERS_PER_ROOM", "16"))
     DEFAULT_VOTE_TIMEOUT: int = int(os.getenv("DEFAULT_VOTE_TIMEOUT", "30"))  # seconds
     PHRASE_CACHE_SIZE: int = int(os.getenv("PHRASE_CACHE_SIZE", "10"))
+    # Also send player_joined/player_reconnected/player_left next to room_state (older clients)
+    SPLIT_PLAYER_EVENTS: bool = os.getenv("SPLIT_PLAYER_EVENTS", "false").lower() == "true"
+    # Announce disconnects as one players_disconnected event per room and window (seconds)
+    BATCH_DISCONNECT_EVENTS: bool = os.getenv("BATCH_DISCONNECT_EVENTS", "false").lower() == "true"
+    DISCONNECT_BATCH_WINDOW: float = float(os.getenv("DISCONNECT_BATCH_WINDOW", "0.05"))
+    
+    # Voice processing settings (hard mode)
+    # Worker processes for pitch/tempo processing; 0 runs it in a thread instead
+    VOICE_PROCESSING_WORKERS: int = int(os.getenv("VOICE_PROCESSING_WORKERS", "2"))
+    # Clips processed (running or queued) at once; later requests wait
+    VOICE_PROCESSING_MAX_PENDING: int = int(os.getenv("VOICE_PROCESSING_MAX_PENDING", "4"))
     
     # Storage settings
     STORAGE_TYPE: str = os.getenv("STORAGE_TYPE", "local")  # "local" or "s3"
@@ -9,9 +9,11 @@ from contextlib import asynccontextmanager
 from config import settings
 from api import rooms, debug
 from sockets.events_minimal import GameSocketEvents
+from sockets.json_codec import get_json_module
 from services.database_service import DatabaseService
 from services.database_state_store import DatabaseStateStore
 from services.state_store import MemoryStateStore, state_store
+from services.voice_processing_service import voice_processing_service
 
 # Configure logging to show emoji characters
 logging.basicConfig(
@@ -24,7 +26,7 @@ logging.basicConfig(
 
 # Set specific loggers to INFO level
 logging.getLogger('services.voice_processing_service').setLevel(logging.INFO)
-logging.getLogger('sockets.events').setLevel(logging.INFO)
+logging.getLogger('sockets.events_minimal').setLevel(logging.INFO)
 logging.getLogger('__main__').setLevel(logging.INFO)
 
 # Initial startup log with emoji
@@ -46,7 +48,8 @@ async def init_database():
         await db_service.initialize()
         
         # Use database-backed state store (now with current_speaker_index support)
-        state_store = DatabaseStateStore(db_service)
+        # Rooms are cached or remembered as missing only when no other instance shares them (no Redis fan-out)
+        state_store = DatabaseStateStore(db_service, process_local=game_events.local_fanout)
         logger.info("✅ Database state store initialized with speaker rotation support")
     else:
         # Use in-memory state store
@@ -103,8 +106,10 @@ async def lifespan(app: FastAPI):
     # Skip ML model initialization at startup to improve boot time
     # Models will be loaded on-demand when first used
     logger.info("🚀 Application started - ML models will be loaded on-demand")
+    voice_processing_service.start_pool()
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    voice_processing_service.shutdown_pool()
 
 # Create FastAPI app
 app = FastAPI(
@@ -138,6 +143,8 @@ def create_socketio_server():
     """Create Socket.IO server with Redis adapter if configured"""
     import socketio
     
+    json_module = get_json_module()
+    
     # Check if Redis is configured for scaling
     if settings.REDIS_URL or (settings.REDIS_HOST and settings.REDIS_PORT):
         try:
@@ -156,7 +163,8 @@ def create_socketio_server():
                 logger=True,
                 engineio_logger=True,
                 max_http_buffer_size=10 * 1024 * 1024,  # 10MB for audio data
-                client_manager=mgr
+                client_manager=mgr,
+                json=json_module
             )
         except Exception as e:
             logger.warning(f"⚠️ Redis adapter failed, using single-instance mode: {e}")
@@ -168,7 +176,8 @@ def create_socketio_server():
         cors_allowed_origins="*",  # Allow all origins for Socket.IO
         logger=True,
         engineio_logger=True,
-        max_http_buffer_size=10 * 1024 * 1024  # 10MB for audio data
+        max_http_buffer_size=10 * 1024 * 1024,  # 10MB for audio data
+        json=json_module
     )
 
 sio = create_socketio_server()
@@ -1,6 +1,9 @@
 from enum import Enum
-from typing import List
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, List, Tuple
 from pydantic import BaseModel
+from models.emotion_3_layer import EMOTIONS_3_LAYER
 
 class BasicEmotion(str, Enum):
     JOY = "joy"
@@ -155,6 +158,25 @@ ADVANCED_EMOTIONS = {
     ),
 }
 
+# 4択モード用の感情セット（コア4感情）
+FOUR_CHOICE_EMOTIONS = {
+    BasicEmotion.JOY: BASIC_EMOTIONS[BasicEmotion.JOY],
+    BasicEmotion.ANGER: BASIC_EMOTIONS[BasicEmotion.ANGER],
+    BasicEmotion.SADNESS: BASIC_EMOTIONS[BasicEmotion.SADNESS],
+    BasicEmotion.SURPRISE: BASIC_EMOTIONS[BasicEmotion.SURPRISE],
+}
+
+# Emotion id pools materialized once so random selection is a single index
+BASIC_EMOTION_IDS = tuple(BASIC_EMOTIONS[key].id for key in BasicEmotion)
+ADVANCED_EMOTION_IDS = tuple(ADVANCED_EMOTIONS[key].id for key in AdvancedEmotion if key in ADVANCED_EMOTIONS)
+FOUR_CHOICE_EMOTION_IDS = tuple(info.id for info in FOUR_CHOICE_EMOTIONS.values())
+WHEEL_EMOTION_IDS = tuple(EMOTIONS_3_LAYER.keys())
+
+# 感情ID → 日本語名（表示用の逆引き、ホイールの24感情を含む）
+EMOTION_ID_TO_NAME_JA: Dict[str, str] = {
+    e.id: e.name_ja for e in chain(BASIC_EMOTIONS.values(), ADVANCED_EMOTIONS.values(), EMOTIONS_3_LAYER.values())
+}
+
 def get_emotions_for_mode(mode: str, vote_type: str = None) -> dict:
     """Get emotions dictionary based on game mode and vote type"""
     # Handle wheel mode
@@ -166,13 +188,7 @@ def get_emotions_for_mode(mode: str, vote_type: str = None) -> dict:
     # Handle choice-based modes
     if vote_type == "4choice":
         # 4-choice mode: only use 4 core emotions
-        four_choice_emotions = {
-            BasicEmotion.JOY: BASIC_EMOTIONS[BasicEmotion.JOY],
-            BasicEmotion.ANGER: BASIC_EMOTIONS[BasicEmotion.ANGER], 
-            BasicEmotion.SADNESS: BASIC_EMOTIONS[BasicEmotion.SADNESS],
-            BasicEmotion.SURPRISE: BASIC_EMOTIONS[BasicEmotion.SURPRISE],
-        }
-        return four_choice_emotions
+        return FOUR_CHOICE_EMOTIONS
     elif vote_type == "8choice":
         # 8-choice mode: use all 8 basic emotions
         return BASIC_EMOTIONS
@@ -180,39 +196,24 @@ def get_emotions_for_mode(mode: str, vote_type: str = None) -> dict:
     # Fallback based on mode for backward compatibility
     if mode == "advanced":
         return BASIC_EMOTIONS  # Changed from ADVANCED_EMOTIONS to BASIC_EMOTIONS for 8-choice
-    elif mode == "wheel":
-        from models.emotion_3_layer import get_emotions_for_3_layer_mode
-        return get_emotions_for_3_layer_mode()
     
     # Default to 4-choice emotions for basic mode
-    four_choice_emotions = {
-        BasicEmotion.JOY: BASIC_EMOTIONS[BasicEmotion.JOY],
-        BasicEmotion.ANGER: BASIC_EMOTIONS[BasicEmotion.ANGER], 
-        BasicEmotion.SADNESS: BASIC_EMOTIONS[BasicEmotion.SADNESS],
-        BasicEmotion.SURPRISE: BASIC_EMOTIONS[BasicEmotion.SURPRISE],
-    }
-    return four_choice_emotions
+    return FOUR_CHOICE_EMOTIONS
 
-def get_emotion_choices_for_voting(mode: str, correct_emotion_id: str, choice_count: int = None, vote_type: str = None) -> List[EmotionInfo]:
-    """Get emotion choices for voting, including the correct one and random others"""
-    import random
-    
-    # For wheel mode, we don't need voting choices since users select from the wheel
+def get_emotion_ids_for_mode(mode: str, vote_type: str = None) -> tuple:
+    """Get the precomputed emotion id pool matching get_emotions_for_mode"""
     if mode == "wheel" or vote_type == "wheel":
-        return []
-    
-    emotions_dict = get_emotions_for_mode(mode, vote_type)
-    all_emotions = list(emotions_dict.values())
-    
-    # Set default choice count based on vote_type or mode if not specified
-    if choice_count is None:
-        if vote_type == "8choice":
-            choice_count = 8
-        elif vote_type == "4choice":
-            choice_count = 4
-        else:
-            # Fallback based on mode
-            choice_count = 8 if mode == "advanced" else 4
+        return WHEEL_EMOTION_IDS
+    if vote_type == "4choice":
+        return FOUR_CHOICE_EMOTION_IDS
+    if vote_type == "8choice" or mode == "advanced":
+        return BASIC_EMOTION_IDS
+    return FOUR_CHOICE_EMOTION_IDS
+
+@lru_cache(maxsize=256)
+def _get_voting_pool(mode: str, correct_emotion_id: str, vote_type: str = None) -> Tuple[EmotionInfo, Tuple[EmotionInfo, ...]]:
+    """Get the correct emotion and the other candidates for a voting round"""
+    all_emotions = list(get_emotions_for_mode(mode, vote_type).values())
     
     # Find the correct emotion
     correct_emotion = next((e for e in all_emotions if e.id == correct_emotion_id), None)
@@ -220,13 +221,26 @@ def get_emotion_choices_for_voting(mode: str, correct_emotion_id: str, choice_co
         raise ValueError(f"Emotion {correct_emotion_id} not found in {mode} mode with vote_type {vote_type}")
     
     # Get other emotions (excluding the correct one)
-    other_emotions = [e for e in all_emotions if e.id != correct_emotion_id]
-    
-    # Randomly select other emotions to fill up to choice_count
-    selected_others = random.sample(other_emotions, min(choice_count - 1, len(other_emotions)))
+    other_emotions = tuple(e for e in all_emotions if e.id != correct_emotion_id)
+    return correct_emotion, other_emotions
+
+@lru_cache(maxsize=256)
+def _get_voting_entries(mode: str, correct_emotion_id: str, vote_type: str = None) -> Tuple[Dict[str, str], Tuple[Dict[str, str], ...]]:
+    """Get _get_voting_pool as {"id", "name"} payload entries (shared; do not modify)"""
+    correct_emotion, other_emotions = _get_voting_pool(mode, correct_emotion_id, vote_type)
+    return (
+        {"id": correct_emotion.id, "name": correct_emotion.name_ja},
+        tuple({"id": e.id, "name": e.name_ja} for e in other_emotions)
+    )
+
+def get_voting_choice_data(mode: str, correct_emotion_id: str, vote_type: str = None) -> List[Dict[str, str]]:
+    """Get the round_start voting choices ({"id", "name"}): 8 for 8choice, otherwise 4, none for wheel"""
+    import random
     
-    # Combine and shuffle
-    choices = [correct_emotion] + selected_others
+    if mode == "wheel" or vote_type == "wheel":
+        return []
+    choice_count = 8 if vote_type == "8choice" else 4
+    correct_entry, other_entries = _get_voting_entries(mode, correct_emotion_id, vote_type)
+    choices = [correct_entry] + random.sample(other_entries, min(choice_count - 1, len(other_entries)))
     random.shuffle(choices)
-    
-    return choices
\ No newline at end of file
+    return choices
@@ -1,8 +1,9 @@
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Literal
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
+from typing import Any, Dict, List, Optional, Literal, Set
 from enum import Enum
 import uuid
 import random
+import sys
 from datetime import datetime, timezone
 
 class GameMode(str, Enum):
@@ -55,6 +56,9 @@ def generate_room_id() -> str:
     return f"{adjective}{noun}{number}"
 
 class Player(BaseModel):
+    # pydantic keeps field values in __dict__; empty slots only drop the per-instance __weakref__
+    __slots__ = ()
+    
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
     score: int = 0
@@ -62,6 +66,12 @@ class Player(BaseModel):
     is_connected: bool = True
     mac_address: Optional[str] = None
     joined_at: datetime = Field(default_factory=datetime.now)
+    
+    @field_validator('name')
+    @classmethod
+    def intern_name(cls, name: str) -> str:
+        # Names key every payload and name lookup for the life of the room
+        return sys.intern(name)
 
 class RoomConfig(BaseModel):
     mode: GameMode = GameMode.BASIC
@@ -70,9 +80,23 @@ class RoomConfig(BaseModel):
     vote_timeout: int = 30  # seconds
     max_rounds: int = 1  # Number of cycles to play
     hard_mode: bool = False  # Enable voice processing for difficulty
+    # Serialized config; lives on the config so rooms sharing it (restart) reuse it
+    _dict_cache: Optional[Dict[str, Any]] = PrivateAttr(default=None)
     
     class Config:
         use_enum_values = True
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        if not name.startswith('_'):
+            # A changed field invalidates the serialized form
+            self._dict_cache = None
+        super().__setattr__(name, value)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Get the JSON-ready config dict (cached until a field changes; do not modify)"""
+        if self._dict_cache is None:
+            self._dict_cache = self.model_dump(mode='json')
+        return self._dict_cache
 
 class AudioRecording(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -84,6 +108,8 @@ class AudioRecording(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now)
 
 class Round(BaseModel):
+    __slots__ = ()
+    
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     phrase: str
     emotion_id: str
@@ -95,6 +121,8 @@ class Round(BaseModel):
     completed_at: Optional[datetime] = None
     # ラウンド開始時の参加者スナップショット（投票権管理用）
     eligible_voters: List[str] = Field(default_factory=list)  # player_ids who can vote
+    # 現在接続中の投票権保持者数（DBには保存しない。Noneなら再計算）
+    expected_votes: Optional[int] = None
     # 投票タイムアウト関連
     voting_started_at: Optional[datetime] = None  # 投票開始時刻
     vote_timeout_seconds: int = 30  # 投票制限時間（秒）
@@ -110,17 +138,176 @@ class Room(BaseModel):
     speaker_order_cache: Optional[List[str]] = None  # Cached speaker order for current cycle
     host_token: str = Field(default_factory=lambda: str(uuid.uuid4()))
     created_at: datetime = Field(default_factory=datetime.now)
+    # Player names in join order, rebuilt only after membership changes
+    _player_names: Optional[List[str]] = PrivateAttr(default=None)
+    # Player id -> name, kept in step by the mutators once built
+    _names_by_id: Optional[Dict[str, str]] = PrivateAttr(default=None)
+    # Ids of connected players, collected lazily and then kept in step by the mutators
+    _connected_ids: Optional[Set[str]] = PrivateAttr(default=None)
+    # [{'name', 'score'}] per player as sent in room_state; reset on membership or score changes
+    _score_board: Optional[List[Dict[str, Any]]] = PrivateAttr(default=None)
+    # Player name -> id of the earliest-joined player with that name
+    _name_index: Optional[Dict[str, str]] = PrivateAttr(default=None)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == 'players':
+            # A replaced players dict invalidates every per-player index
+            self._player_names = None
+            self._names_by_id = None
+            self._name_index = None
+            self._connected_ids = None
+            self._score_board = None
+        super().__setattr__(name, value)
+    
+    def config_as_dict(self) -> Dict[str, Any]:
+        """Get the serialized room config (cached on the RoomConfig instance)"""
+        return self.config.as_dict()
+    
+    @property
+    def player_names(self) -> List[str]:
+        """Get player names in join order (cached until players are added or removed)"""
+        if self._player_names is None:
+            self._player_names = [player.name for player in self.players.values()]
+        return self._player_names
+    
+    @property
+    def player_names_by_id(self) -> Dict[str, str]:
+        """Get player names keyed by player id (shared; do not modify)"""
+        if self._names_by_id is None:
+            self._names_by_id = {player_id: player.name for player_id, player in self.players.items()}
+        return self._names_by_id
+    
+    @property
+    def connected_player_ids(self) -> Set[str]:
+        """Get the ids of connected players (shared; do not modify)"""
+        if self._connected_ids is None:
+            self._connected_ids = {player_id for player_id, player in self.players.items() if player.is_connected}
+        return self._connected_ids
+    
+    @property
+    def connected_count(self) -> int:
+        """Get the number of connected players"""
+        return len(self.connected_player_ids)
+    
+    def score_board(self) -> List[Dict[str, Any]]:
+        """Get player names and scores in join order (shared; do not modify)"""
+        if self._score_board is None:
+            self._score_board = [{'name': player.name, 'score': player.score} for player in self.players.values()]
+        return self._score_board
+    
+    def award_points(self, player: Player, points: int) -> None:
+        """Add points to a player's score"""
+        player.score += points
+        self._score_board = None
+    
+    def reset_scores(self) -> None:
+        """Set every player's score back to 0"""
+        # The zeroed board is needed for the room_state that follows, so build it in the same pass
+        score_board = []
+        for player in self.players.values():
+            player.score = 0
+            score_board.append({'name': player.name, 'score': 0})
+        self._score_board = score_board
+    
+    def inherit_player_indexes(self, other: 'Room') -> None:
+        """Reuse another room's name indexes; players must have the same ids, names and order"""
+        # The names list is replaced rather than mutated, so it can be shared
+        self._player_names = other._player_names
+        if other._names_by_id is not None:
+            self._names_by_id = other._names_by_id.copy()
+        if other._name_index is not None:
+            self._name_index = other._name_index.copy()
+    
+    def find_player_by_name(self, name: str) -> Optional[Player]:
+        """Find the earliest-joined player with the given name"""
+        if self._name_index is None:
+            name_index: Dict[str, str] = {}
+            for player_id, player in self.players.items():
+                name_index.setdefault(player.name, player_id)
+            self._name_index = name_index
+        player_id = self._name_index.get(name)
+        return self.players.get(player_id) if player_id else None
+    
+    def add_player(self, player: Player) -> None:
+        """Add a player to the room"""
+        previous = self.players.get(player.id)
+        self.players[player.id] = player
+        if self._names_by_id is not None:
+            self._names_by_id[player.id] = player.name
+        if previous is not None:
+            self._player_names = None
+            self._score_board = None
+            self._name_index = None
+        else:
+            # New players go last in join order, so extend the caches instead of
+            # rebuilding them. Copy rather than append: earlier lists may still be
+            # referenced by payloads that are being sent.
+            if self._player_names is not None:
+                self._player_names = self._player_names + [player.name]
+            if self._score_board is not None:
+                self._score_board = self._score_board + [{'name': player.name, 'score': player.score}]
+            if self._name_index is not None:
+                self._name_index.setdefault(player.name, player.id)
+        if self._connected_ids is not None:
+            if player.is_connected:
+                self._connected_ids.add(player.id)
+            else:
+                self._connected_ids.discard(player.id)
+    
+    def set_player_connected(self, player: Player, connected: bool) -> bool:
+        """Update a player's connection state. Returns True if it changed"""
+        if player.is_connected == connected:
+            return False
+        player.is_connected = connected
+        if self._connected_ids is not None:
+            if connected:
+                self._connected_ids.add(player.id)
+            else:
+                self._connected_ids.discard(player.id)
+        self._adjust_expected_votes(player.id, 1 if connected else -1)
+        return True
+    
+    def _adjust_expected_votes(self, player_id: str, delta: int) -> None:
+        round_data = self.current_round
+        if round_data and round_data.expected_votes is not None and player_id in round_data.eligible_voters:
+            round_data.expected_votes += delta
+    
+    def expected_vote_count(self) -> int:
+        """Get the number of connected eligible voters in the current round"""
+        round_data = self.current_round
+        if not round_data:
+            return 0
+        if round_data.expected_votes is None:
+            connected_ids = self.connected_player_ids
+            round_data.expected_votes = sum(1 for voter_id in round_data.eligible_voters if voter_id in connected_ids)
+        return round_data.expected_votes
+    
+    def rename_player(self, player: Player, name: str) -> None:
+        """Change a player's display name"""
+        old_name = player.name
+        name = sys.intern(name)
+        player.name = name
+        self._player_names = None
+        if self._names_by_id is not None:
+            self._names_by_id[player.id] = name
+        self._score_board = None
+        if self._name_index is not None:
+            if self._name_index.get(old_name) == player.id or name in self._name_index:
+                # Join order decides between players sharing a name; rebuild on next lookup
+                self._name_index = None
+            else:
+                self._name_index[name] = player.id
     
     def get_speaker_order(self) -> List[str]:
         """Get ordered list of player IDs for speaking"""
         # Check if cached order is still valid
-        connected_player_ids = {pid for pid, player in self.players.items() if player.is_connected}
+        connected_player_ids = self.connected_player_ids
         if (self.speaker_order_cache and 
             set(self.speaker_order_cache) == connected_player_ids):
             return self.speaker_order_cache
         
         # Generate new order - only include connected players
-        player_ids = [pid for pid, player in self.players.items() if player.is_connected]
+        player_ids = [pid for pid in self.players if pid in connected_player_ids]
         if self.config.speaker_order == SpeakerOrder.RANDOM:
             import random
             random.shuffle(player_ids)
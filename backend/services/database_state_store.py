@@ -2,11 +2,13 @@
 Database-backed StateStore implementation
 """
 
-from typing import Dict, Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timezone
-from sqlalchemy import select, delete, func
+from sqlalchemy import select, delete, func, insert
 from sqlalchemy.orm import selectinload
 import logging
+import time
 import uuid
 
 from models.game import Room, RoomConfig, Player, Round as RoundData
@@ -25,8 +27,67 @@ logger = logging.getLogger(__name__)
 class DatabaseStateStore(StateStore):
     """Database-backed state store implementation"""
     
-    def __init__(self, db_service: DatabaseService):
+    # Seconds a "room not found" answer is reused before querying again
+    MISSING_ROOM_TTL = 5.0
+    # Most room codes remembered as missing; guessed codes would grow it forever
+    MISSING_ROOMS_MAX = 1024
+    # Seconds a loaded room is served from memory; writes drop it earlier
+    ROOM_CACHE_TTL = 1.0
+    # Most rooms held in the load cache at once
+    ROOM_CACHE_MAX = 1024
+    # Most per-room configs kept for reuse (least recently loaded go first)
+    ROOM_CONFIGS_MAX = 1024
+    
+    def __init__(self, db_service: DatabaseService, process_local: bool = True):
+        super().__init__()
         self.db = db_service
+        # Whether this process is the only one changing its rooms. With several workers
+        # (Redis fan-out) their writes are invisible here, so rooms are neither cached
+        # nor remembered as missing.
+        self._process_local = process_local
+        # Room codes with no active session -> monotonic expiry time
+        # (insertion order is expiry order since every entry shares one TTL)
+        self._missing_rooms: "OrderedDict[str, float]" = OrderedDict()
+        # Room code -> (monotonic expiry time, room loaded from the database)
+        # (bounded like _missing_rooms; entries share ROOM_CACHE_TTL)
+        self._room_cache: "OrderedDict[str, Tuple[float, Room]]" = OrderedDict()
+        # Last RoomConfig built per room code; reused while the stored values match
+        # so its serialized form (RoomConfig.as_dict) survives room rebuilds
+        self._room_configs: "OrderedDict[str, RoomConfig]" = OrderedDict()
+    
+    def _remember_missing(self, room_id: str) -> None:
+        """Record a room code as missing, sweeping expired and excess entries"""
+        # A room without an active session has no config worth reusing
+        self._room_configs.pop(room_id, None)
+        if not self._process_local:
+            # Another worker may create the room at any moment
+            return
+        now = time.monotonic()
+        missing = self._missing_rooms
+        missing.pop(room_id, None)
+        missing[room_id] = now + self.MISSING_ROOM_TTL
+        while missing and next(iter(missing.values())) <= now:
+            missing.popitem(last=False)
+        while len(missing) > self.MISSING_ROOMS_MAX:
+            missing.popitem(last=False)
+    
+    def _cache_room(self, room: Room) -> None:
+        """Keep a loaded room for ROOM_CACHE_TTL, sweeping expired and excess entries"""
+        if not self._process_local:
+            return
+        now = time.monotonic()
+        cache = self._room_cache
+        cache.pop(room.id, None)
+        cache[room.id] = (now + self.ROOM_CACHE_TTL, room)
+        while cache and next(iter(cache.values()))[0] <= now:
+            cache.popitem(last=False)
+        while len(cache) > self.ROOM_CACHE_MAX:
+            cache.popitem(last=False)
+    
+    @staticmethod
+    def _config_values(config: RoomConfig) -> Tuple:
+        return (config.mode, config.vote_type, config.speaker_order,
+                config.max_rounds, config.hard_mode, config.vote_timeout)
     
     def _map_phase_to_status(self, phase: str) -> str:
         """Map GamePhase to ChatSession status"""
@@ -49,6 +110,8 @@ class DatabaseStateStore(StateStore):
     
     async def create_room(self, room: Room) -> None:
         """Create a new room in the database"""
+        self._missing_rooms.pop(room.id, None)
+        self._room_cache.pop(room.id, None)
         async with self.db.get_session() as session:
             # Check if mode exists, create if not
             mode_result = await session.execute(
@@ -95,7 +158,33 @@ class DatabaseStateStore(StateStore):
             await session.commit()
     
     async def get_room(self, room_id: str) -> Optional[Room]:
-        """Get a room from the database"""
+        """Get a room from the database
+        
+        Rooms that are dirty or were loaded within ROOM_CACHE_TTL (process-local
+        stores only) are returned as the same instance to every caller, as
+        MemoryStateStore does. Callers that read, modify and write a room back
+        must hold the socket layer's per-room lock (GameSocketBase._lock_for),
+        as every game event handler does.
+        """
+        # Unflushed (or still flushing) changes are newer than what the database holds
+        dirty_room = self._unwritten_room(room_id)
+        if dirty_room is not None:
+            return dirty_room
+        
+        # A burst of events for the same room reuses the room loaded just before
+        cached = self._room_cache.get(room_id)
+        if cached is not None:
+            if time.monotonic() < cached[0]:
+                return cached[1]
+            del self._room_cache[room_id]
+        
+        # Repeated joins to a missing room skip the query for a few seconds
+        expires_at = self._missing_rooms.get(room_id)
+        if expires_at is not None:
+            if time.monotonic() < expires_at:
+                return None
+            del self._missing_rooms[room_id]
+        
         async with self.db.get_session() as session:
             # Get the latest active chat session for this room_code
             result = await session.execute(
@@ -112,17 +201,27 @@ class DatabaseStateStore(StateStore):
             chat_session = result.scalars().first()
             
             if not chat_session:
+                self._remember_missing(room_id)
                 return None
             
             # Reconstruct Room object
-            config = RoomConfig(
-                mode=chat_session.mode.name,
-                vote_type=chat_session.vote_type,
-                speaker_order=chat_session.speaker_order,
-                max_rounds=chat_session.max_rounds,
-                hard_mode=chat_session.hard_mode,
-                vote_timeout=chat_session.vote_timeout
-            )
+            configs = self._room_configs
+            config = configs.get(room_id)
+            if config is None or self._config_values(config) != (
+                    chat_session.mode.name, chat_session.vote_type, chat_session.speaker_order,
+                    chat_session.max_rounds, chat_session.hard_mode, chat_session.vote_timeout):
+                config = RoomConfig(
+                    mode=chat_session.mode.name,
+                    vote_type=chat_session.vote_type,
+                    speaker_order=chat_session.speaker_order,
+                    max_rounds=chat_session.max_rounds,
+                    hard_mode=chat_session.hard_mode,
+                    vote_timeout=chat_session.vote_timeout
+                )
+                configs[room_id] = config
+                if len(configs) > self.ROOM_CONFIGS_MAX:
+                    configs.popitem(last=False)
+            configs.move_to_end(room_id)
             
             # Load players and calculate their scores from the current session only
             players = {}
@@ -149,7 +248,7 @@ class DatabaseStateStore(StateStore):
                     score=session_score  # Calculate from current session scores only
                 )
                 players[player.id] = player
-                logger.info(f"🎯 Loaded player {player.name} with session score: {session_score} (session: {chat_session.id})")
+                logger.info("🎯 Loaded player %s with session score: %s (session: %s)", player.name, session_score, chat_session.id)
             
             # Load rounds
             rounds = []
@@ -162,7 +261,7 @@ class DatabaseStateStore(StateStore):
                     try:
                         eligible_voters = json.loads(db_round.eligible_voters)
                     except json.JSONDecodeError:
-                        logger.warning(f"Failed to parse eligible_voters for round {db_round.id}")
+                        logger.warning("Failed to parse eligible_voters for round %s", db_round.id)
                 
                 # Ensure voting_started_at has timezone info
                 voting_started_at = db_round.voting_started_at
@@ -192,7 +291,7 @@ class DatabaseStateStore(StateStore):
                     voting_started_at=voting_started_at,
                     vote_timeout_seconds=db_round.vote_timeout_seconds or 30
                 )
-                logger.info(f"⏰ Loaded round {db_round.id} with voting_started_at: {db_round.voting_started_at}")
+                logger.info("⏰ Loaded round %s with voting_started_at: %s", db_round.id, db_round.voting_started_at)
                 rounds.append(round_data)
             
             # Determine current_round based on room phase
@@ -215,10 +314,14 @@ class DatabaseStateStore(StateStore):
                 created_at=chat_session.created_at
             )
             
+            self._cache_room(room)
             return room
     
     async def update_room(self, room: Room) -> None:
         """Update a room in the database"""
+        self._room_cache.pop(room.id, None)
+        self._dirty_rooms.pop(room.id, None)
+        self._dirty_full.discard(room.id)
         async with self.db.get_session() as session:
             # Update the latest active chat session for this room_code
             result = await session.execute(
@@ -334,7 +437,7 @@ class DatabaseStateStore(StateStore):
                         existing_round.eligible_voters = eligible_voters_json
                         existing_round.voting_started_at = round_data.voting_started_at
                         existing_round.vote_timeout_seconds = round_data.vote_timeout_seconds
-                        logger.info(f"⏰ Updated existing round {round_data.id} with voting_started_at: {round_data.voting_started_at}")
+                        logger.info("⏰ Updated existing round %s with voting_started_at: %s", round_data.id, round_data.voting_started_at)
                 
                 # Save votes for this round
                 if round_data.votes:
@@ -354,12 +457,44 @@ class DatabaseStateStore(StateStore):
                         )
                         session.add(vote)
                     
-                    logger.info(f"💾 Saved {len(round_data.votes)} votes for round {round_data.id}")
+                    logger.info("💾 Saved %s votes for round %s", len(round_data.votes), round_data.id)
             
             await session.commit()
     
+    async def update_round_votes(self, room: Room) -> None:
+        """Replace the stored votes of the current round without rewriting the room"""
+        self._room_cache.pop(room.id, None)
+        round_data = room.current_round
+        if not round_data:
+            return
+        
+        from models.database import EmotionVote
+        async with self.db.get_session() as session:
+            existing_round = await session.execute(
+                select(Round.id).where(Round.id == round_data.id)
+            )
+            round_stored = existing_round.scalar_one_or_none() is not None
+            if round_stored:
+                await session.execute(
+                    delete(EmotionVote).where(EmotionVote.round_id == round_data.id)
+                )
+                for player_id, emotion_id in round_data.votes.items():
+                    session.add(EmotionVote(
+                        round_id=round_data.id,
+                        voter_session_id=player_id,
+                        selected_emotion_id=emotion_id,
+                        is_correct=(emotion_id == round_data.emotion_id)
+                    ))
+                await session.commit()
+        
+        if not round_stored:
+            # Round not stored yet; fall back to the full write
+            await self.update_room(room)
+    
     async def delete_room(self, room_id: str) -> None:
         """Delete a room from the database"""
+        self._room_configs.pop(room_id, None)
+        self._room_cache.pop(room_id, None)
         async with self.db.get_session() as session:
             # Delete all sessions for this room_code (cascade delete will handle related records)
             await session.execute(
@@ -461,10 +596,39 @@ class DatabaseStateStore(StateStore):
             )
             session.add(score)
             await session.commit()
-            logger.info(f"Saved score: player={player_id}, round={round_id}, points={points}, type={score_type}")
+            logger.info("Saved score: player=%s, round=%s, points=%s, type=%s", player_id, round_id, points, score_type)
+    
+    async def save_scores(self, room_id: str, round_id: str, entries: List[Tuple[str, int, str]]) -> None:
+        """Save all score entries of a round in one transaction"""
+        from models.database import Score
+        
+        if not entries:
+            return
+        
+        async with self.db.get_session() as session:
+            # One executemany INSERT; skips ORM unit-of-work bookkeeping per row
+            await session.execute(
+                insert(Score),
+                [
+                    {
+                        'session_id': player_id,
+                        'round_id': round_id,
+                        'points': points,
+                        'score_type': score_type
+                    }
+                    for player_id, points, score_type in entries
+                ]
+            )
+            await session.commit()
+            logger.info("Saved %s scores for round %s", len(entries), round_id)
     
     async def _end_current_session_and_create_new(self, old_room: Room, new_room: Room) -> None:
         """End current session and create new session for restart_game"""
+        # A pending deferred write of the old room would land on the new session
+        self._room_cache.pop(old_room.id, None)
+        self._dirty_rooms.pop(old_room.id, None)
+        self._dirty_full.discard(old_room.id)
+        self._flushing_rooms.pop(old_room.id, None)
         async with self.db.get_session() as session:
             # 1. End ALL active sessions for this room_code
             result = await session.execute(
@@ -477,9 +641,9 @@ class DatabaseStateStore(StateStore):
             for current_session in active_sessions:
                 current_session.status = "finished"
                 current_session.finished_at = datetime.now(timezone.utc)
-                logger.info(f"🔄 Ended session {current_session.id}")
+                logger.info("🔄 Ended session %s", current_session.id)
             
-            logger.info(f"🔄 Ended {len(active_sessions)} active sessions for room_code {old_room.id}")
+            logger.info("🔄 Ended %s active sessions for room_code %s", len(active_sessions), old_room.id)
             
             # 2. Create new session with same room_code
             # Check if mode exists, create if not
@@ -513,7 +677,7 @@ class DatabaseStateStore(StateStore):
             session.add(new_session)
             await session.flush()  # Get the new session ID
             
-            logger.info(f"🔄 Created new session {new_session.id} for room_code {new_room.id}")
+            logger.info("🔄 Created new session %s for room_code %s", new_session.id, new_room.id)
             
             # 3. Create room participants for new session with autoflush disabled
             with session.no_autoflush:
@@ -527,4 +691,5 @@ class DatabaseStateStore(StateStore):
                     session.add(participant)
             
             await session.commit()
-            logger.info(f"🔄 Successfully created new game session")
\ No newline at end of file
+            logger.info("🔄 Successfully created new game session")
+        self._missing_rooms.pop(new_room.id, None)
\ No newline at end of file
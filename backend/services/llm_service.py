@@ -1,10 +1,19 @@
 from openai import AsyncOpenAI
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
 import random
 from config import settings
 # Emotion mappings are now handled directly in this service
 
+logger = logging.getLogger(__name__)
+
 class LLMService:
+    # Number of OpenAI phrases generated ahead of time for start_round
+    PREFETCH_SIZE = 8
+    # Seconds the refill task pauses after a failed or unusable OpenAI response
+    PREFETCH_RETRY_DELAY = 5.0
+    
     def __init__(self):
         self.client = None
         # Fallback phrases for when LLM is unavailable
@@ -20,6 +29,11 @@ class LLMService:
             "なるほどね",
             "ふーん"
         ]
+        # In-flight phrase requests keyed by mode, shared by concurrent callers
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Prefetched OpenAI phrases (phrases don't depend on mode, so one queue serves all rooms)
+        self._phrase_queue: Optional[asyncio.Queue] = None
+        self._prefetch_task: Optional[asyncio.Task] = None
         self._initialize_client()
     
     def _initialize_client(self):
@@ -35,132 +49,183 @@ class LLMService:
             else:
                 print("No OpenAI API key found, using fallback phrases only")
                 self.client = None
-        except Exception as e:
-            print(f"Exception during OpenAI client initialization: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Exception during OpenAI client initialization")
             self.client = None
     
     def set_api_key(self, api_key: str):
         """Dynamically set the OpenAI API key"""
         settings.OPENAI_API_KEY = api_key
         self.client = None  # Clear existing client
+        self._stop_prefetch()
         self._initialize_client()
 
     
     async def generate_phrase_with_emotion(self, mode: str = "basic", vote_type: str = None) -> Tuple[str, str]:
         """Generate a phrase and select an emotion from available pool"""
         try:
-            # Use the full emotion pool from emotion models for more variety
-            from models.emotion import get_emotions_for_mode
-            emotions_dict = get_emotions_for_mode(mode, vote_type)
-            
-            # Convert to list for random selection
-            available_emotions = []
-            for emotion_info in emotions_dict.values():
-                available_emotions.append({
-                    'id': emotion_info.id,
-                    'name_ja': emotion_info.name_ja,
-                    'name_en': emotion_info.name_en
-                })
-            
-            # Select random emotion from the full pool
-            selected_emotion = random.choice(available_emotions)
-            
-            emotion_id = selected_emotion['id']
+            # Select random emotion from the precomputed pool for this mode
+            from models.emotion import get_emotion_ids_for_mode
+            emotion_id = random.choice(get_emotion_ids_for_mode(mode, vote_type))
             
             # Generate phrase with LLM
             if self.client:
                 try:
-                    phrase = await self._generate_phrase_with_openai()
+                    phrase = await self._next_phrase(mode)
                 except Exception as openai_error:
-                    print(f"OpenAI API error in generate_phrase_with_emotion: {openai_error}")
+                    logger.warning("OpenAI API error in generate_phrase_with_emotion: %s", openai_error)
                     phrase = random.choice(self.fallback_phrases)
             else:
                 phrase = random.choice(self.fallback_phrases)
             
             return phrase, emotion_id
             
-        except Exception as e:
-            print(f"Error generating phrase: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error generating phrase")
             # Fallback to basic emotions
             phrase = random.choice(self.fallback_phrases)
             fallback_emotions = ['joy', 'anger', 'sadness', 'surprise', 'fear', 'disgust', 'trust', 'anticipation']
             emotion_id = random.choice(fallback_emotions)
             return phrase, emotion_id
     
+    async def _next_phrase(self, mode: str) -> str:
+        """Take a prefetched phrase, or generate one live when the queue is empty
+        
+        An empty queue goes live straight away rather than waiting on the refill
+        task; whatever the refill task is fetching is queued for a later round.
+        """
+        queue = self._ensure_prefetch()
+        try:
+            return queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return await self._generate_phrase_coalesced(mode)
+    
+    def _ensure_prefetch(self) -> asyncio.Queue:
+        """Create the phrase queue and start its refill task on first use (needs a running loop)"""
+        if self._phrase_queue is None:
+            self._phrase_queue = asyncio.Queue(maxsize=self.PREFETCH_SIZE)
+        if self._prefetch_task is None or self._prefetch_task.done():
+            self._prefetch_task = asyncio.create_task(self._prefetch_phrases(self._phrase_queue))
+        return self._phrase_queue
+    
+    async def _prefetch_phrases(self, queue: asyncio.Queue):
+        """Keep the phrase queue filled with OpenAI phrases; put() blocks while it is full"""
+        while self.client:
+            try:
+                phrase = await self._request_openai_phrase()
+            except Exception as e:
+                logger.warning("OpenAI API error while prefetching phrases: %s", e)
+                phrase = None
+            if phrase is None:
+                # Fallback phrases are never queued; back off instead of retrying at once
+                await asyncio.sleep(self.PREFETCH_RETRY_DELAY)
+                continue
+            await queue.put(phrase)
+    
+    def _stop_prefetch(self):
+        """Cancel the refill task and drop phrases generated with the previous client"""
+        if self._prefetch_task is not None:
+            self._prefetch_task.cancel()
+        self._prefetch_task = None
+        self._phrase_queue = None
+    
+    async def _generate_phrase_coalesced(self, mode: str) -> str:
+        """Generate a phrase, sharing one OpenAI call between concurrent callers of the same mode"""
+        inflight = self._inflight.get(mode)
+        if inflight is not None:
+            # shield so a cancelled waiter doesn't cancel the shared request
+            return await asyncio.shield(inflight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[mode] = future
+        try:
+            phrase = await self._generate_phrase_with_openai()
+            future.set_result(phrase)
+            return phrase
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited future doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            self._inflight.pop(mode, None)
+    
     async def _generate_phrase_with_openai(self) -> str:
         """Generate phrase using OpenAI API"""
         try:
-            if not self.client:
-                print("OpenAI client not initialized")
-                return random.choice(self.fallback_phrases)
-            length_choice = random.choices(
-            ["very_short","short", "mid", "long"], weights=[4,4, 1, 1], k=1
-            )[0]
-            prompt = f"""
-            あなたは日本語の台詞生成AIです。
-            以下の手順で**事前に一切公表せず**内部でランダム抽選を行ってください。
-            
-            1. 日常シチュエーションを1つ選ぶ  
-               例: 朝の通勤電車 / コンビニで会計 / 友人とのLINE / 雨の日の帰宅 / ゲームのVC など10種以上を内部リスト化し、その中から無作為抽選
-            
-            2. 感情を1つ選ぶ  
-               例: 喜び・怒り・悲しみ・驚き・焦り・困惑・照れ・感謝・不安・ワクワク などから無作為抽選
-            
-            3. “同じ言葉でも状況で意味が変わる”効果が出るよう、**二重の意味合い**をもつワードや語尾を活かす
-            
-            - 台詞長カテゴリ: **{length_choice}**
-                - very_short → 2〜5文字
-                - short → 5〜10文字
-                - mid   → 15〜30文字
-                - long  → 70〜120文字
-            - 台詞のみ（かっこなし・説明文なし・改行なし）を出力し、説明禁止
-            - 条件を満たさなければ再生成して最終的に条件を満たす台詞を返す
-            セリフのみを出力してください
-            """
+            phrase = await self._request_openai_phrase()
+        except Exception:
+            logger.exception("OpenAI API error")
+            phrase = None
+        if phrase is None:
+            return random.choice(self.fallback_phrases)
+        return phrase
+    
+    async def _request_openai_phrase(self) -> Optional[str]:
+        """Ask OpenAI for one phrase; None when the client is missing or the reply is unusable"""
+        if not self.client:
+            logger.warning("OpenAI client not initialized")
+            return None
+        length_choice = random.choices(
+        ["very_short","short", "mid", "long"], weights=[4,4, 1, 1], k=1
+        )[0]
+        prompt = f"""
+        あなたは日本語の台詞生成AIです。
+        以下の手順で**事前に一切公表せず**内部でランダム抽選を行ってください。
+        
+        1. 日常シチュエーションを1つ選ぶ  
+           例: 朝の通勤電車 / コンビニで会計 / 友人とのLINE / 雨の日の帰宅 / ゲームのVC など10種以上を内部リスト化し、その中から無作為抽選
+        
+        2. 感情を1つ選ぶ  
+           例: 喜び・怒り・悲しみ・驚き・焦り・困惑・照れ・感謝・不安・ワクワク などから無作為抽選
+        
+        3. “同じ言葉でも状況で意味が変わる”効果が出るよう、**二重の意味合い**をもつワードや語尾を活かす
+        
+        - 台詞長カテゴリ: **{length_choice}**
+            - very_short → 2〜5文字
+            - short → 5〜10文字
+            - mid   → 15〜30文字
+            - long  → 70〜120文字
+        - 台詞のみ（かっこなし・説明文なし・改行なし）を出力し、説明禁止
+        - 条件を満たさなければ再生成して最終的に条件を満たす台詞を返す
+        セリフのみを出力してください
+        """
 
 
-            
-            response = await self.client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[
-                    {"role": "system", "content": "あなたは日本語の台詞生成の専門家です。"},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=100,
-                temperature=1.2,
-                timeout=10.0,  # 10 second timeout
-                frequency_penalty = 0.3,
-                presence_penalty = 0.3,
-                top_p = 0.9,
-            )
-            
-            if not response or not response.choices:
-                print("No response from OpenAI API")
-                return random.choice(self.fallback_phrases)
-            
-            phrase = response.choices[0].message.content
-            if not phrase:
-                print("Empty content from OpenAI API")
-                return random.choice(self.fallback_phrases)
-                
-            phrase = phrase.strip()
-            
-            # Validate phrase length
-            if len(phrase) > 50 or len(phrase) < 2:
-                print(f"Invalid phrase length: {len(phrase)}")
-                return random.choice(self.fallback_phrases)
-            
-            return phrase
-            
-        except Exception as e:
-            print(f"OpenAI API error: {e}")
-            import traceback
-            traceback.print_exc()
-            return random.choice(self.fallback_phrases)
+        
+        response = await self.client.chat.completions.create(
+            model="gpt-4.1-mini",
+            messages=[
+                {"role": "system", "content": "あなたは日本語の台詞生成の専門家です。"},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=100,
+            temperature=1.2,
+            timeout=10.0,  # 10 second timeout
+            frequency_penalty = 0.3,
+            presence_penalty = 0.3,
+            top_p = 0.9,
+        )
+        
+        if not response or not response.choices:
+            logger.warning("No response from OpenAI API")
+            return None
+        
+        phrase = response.choices[0].message.content
+        if not phrase:
+            logger.warning("Empty content from OpenAI API")
+            return None
+            
+        phrase = phrase.strip()
+        
+        # Validate phrase length
+        if len(phrase) > 50 or len(phrase) < 2:
+            logger.warning("Invalid phrase length: %d", len(phrase))
+            return None
+        
+        return phrase
     
     async def generate_batch_phrases(self, count: int = 5, mode: str = "basic", vote_type: str = None) -> List[Tuple[str, str]]:
         """Generate multiple phrases with emotions"""
@@ -1,10 +1,115 @@
+import asyncio
+import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from models.game import Room, AudioRecording
 
+logger = logging.getLogger(__name__)
+
+# lookup_sid() result for a sid that is not bound to a player
+_UNBOUND_SID: Tuple[None, None] = (None, None)
+
 class StateStore(ABC):
     """Abstract state store for room management"""
     
+    # Seconds to wait before writing rooms marked dirty
+    FLUSH_INTERVAL = 0.05
+    
+    def __init__(self):
+        # Socket sids per player (process-local connection state, never persisted)
+        self.player_sids: Dict[str, Set[str]] = {}
+        # sid -> (room_id, player_id), so a lookup is a single dict access
+        self._sid_index: Dict[str, Tuple[str, str]] = {}
+        self._room_sids: Dict[str, Set[str]] = {}
+        # Rooms changed in memory but not yet written by update_room
+        self._dirty_rooms: Dict[str, Room] = {}
+        # Dirty rooms with changes beyond current-round votes
+        self._dirty_full: Set[str] = set()
+        # Dirty rooms being written; served from memory until the write commits
+        self._flushing_rooms: Dict[str, Room] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    def mark_dirty(self, room: Room, votes_only: bool = False) -> None:
+        """Schedule a deferred write for a room, coalescing repeated changes
+
+        With votes_only=True only the current round's votes are written,
+        unless a full write is already pending for the room.
+        """
+        self._dirty_rooms[room.id] = room
+        if not votes_only:
+            self._dirty_full.add(room.id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_dirty_rooms())
+    
+    async def _flush_dirty_rooms(self) -> None:
+        """Write all dirty rooms after FLUSH_INTERVAL"""
+        await asyncio.sleep(self.FLUSH_INTERVAL)
+        while self._dirty_rooms:
+            room_id = next(iter(self._dirty_rooms))
+            room = self._dirty_rooms.pop(room_id)
+            full = room_id in self._dirty_full
+            self._dirty_full.discard(room_id)
+            # Changes made during the write mark the room dirty again and are written next
+            self._flushing_rooms[room_id] = room
+            try:
+                if full:
+                    await self.update_room(room)
+                else:
+                    await self.update_round_votes(room)
+            except Exception as e:
+                logger.error("Failed to flush room %s: %s", room_id, e)
+            finally:
+                if self._flushing_rooms.get(room_id) is room:
+                    del self._flushing_rooms[room_id]
+    
+    def _unwritten_room(self, room_id: str) -> Optional[Room]:
+        """Get a room whose changes are not committed yet (dirty or being flushed)"""
+        room = self._dirty_rooms.get(room_id)
+        if room is None:
+            room = self._flushing_rooms.get(room_id)
+        return room
+    
+    def bind_sid(self, player_id: str, sid: str, room_id: str) -> None:
+        """Associate a socket sid with a player in a room"""
+        previous = self._sid_index.get(sid)
+        if previous is not None:
+            if previous[1] != player_id:
+                self.unbind_sid(sid)
+            elif previous[0] != room_id:
+                self._discard_room_sid(previous[0], sid)
+        self._sid_index[sid] = (room_id, player_id)
+        self.player_sids.setdefault(player_id, set()).add(sid)
+        self._room_sids.setdefault(room_id, set()).add(sid)
+    
+    def room_sids(self, room_id: str) -> Set[str]:
+        """Get the socket sids currently bound to a room (do not modify)"""
+        return self._room_sids.get(room_id, set())
+    
+    def _discard_room_sid(self, room_id: str, sid: str) -> None:
+        sids = self._room_sids.get(room_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._room_sids[room_id]
+    
+    def lookup_sid(self, sid: str) -> Tuple[Optional[str], Optional[str]]:
+        """Get the (room_id, player_id) a socket sid is bound to"""
+        return self._sid_index.get(sid, _UNBOUND_SID)
+    
+    def unbind_sid(self, sid: str) -> Optional[str]:
+        """Remove a socket sid binding and return the player it belonged to"""
+        binding = self._sid_index.pop(sid, None)
+        if binding is None:
+            return None
+        room_id, player_id = binding
+        self._discard_room_sid(room_id, sid)
+        sids = self.player_sids.get(player_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self.player_sids[player_id]
+        return player_id
+    
     @abstractmethod
     async def create_room(self, room: Room) -> None:
         pass
@@ -17,6 +122,10 @@ class StateStore(ABC):
     async def update_room(self, room: Room) -> None:
         pass
     
+    async def update_round_votes(self, room: Room) -> None:
+        """Persist only the current round's votes (defaults to a full update)"""
+        await self.update_room(room)
+    
     @abstractmethod
     async def delete_room(self, room_id: str) -> None:
         pass
@@ -40,11 +149,17 @@ class StateStore(ABC):
     @abstractmethod
     async def save_score(self, room_id: str, round_id: str, player_id: str, points: int, score_type: str) -> None:
         pass
+    
+    async def save_scores(self, room_id: str, round_id: str, entries: List[Tuple[str, int, str]]) -> None:
+        """Save several (player_id, points, score_type) entries for one round"""
+        for player_id, points, score_type in entries:
+            await self.save_score(room_id, round_id, player_id, points, score_type)
 
 class MemoryStateStore(StateStore):
     """In-memory implementation of state store"""
     
     def __init__(self):
+        super().__init__()
         self._rooms: Dict[str, Room] = {}
         self._audio_recordings: Dict[str, AudioRecording] = {}
     
@@ -57,6 +172,10 @@ class MemoryStateStore(StateStore):
     async def update_room(self, room: Room) -> None:
         self._rooms[room.id] = room
     
+    def mark_dirty(self, room: Room, votes_only: bool = False) -> None:
+        # Rooms are held by reference, so there is nothing to write later
+        self._rooms[room.id] = room
+    
     async def delete_room(self, room_id: str) -> None:
         self._rooms.pop(room_id, None)
     
@@ -1,8 +1,12 @@
 import io
 import wave
+import asyncio
 import logging
+import multiprocessing
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional, Tuple
+from config import settings
 from models.voice_processing import (
     VoiceProcessingConfig, 
     VoiceProcessingPattern,
@@ -35,8 +39,11 @@ class VoiceProcessingService:
             self.AudioSegment = AudioSegment
             logger.info("🎵 ✅ Librosa audio processing initialized successfully")
         except ImportError as e:
-            logger.error(f"🎵 ❌ Audio processing libraries not available: {e} - voice processing disabled")
+            logger.error("🎵 ❌ Audio processing libraries not available: %s - voice processing disabled", e)
             self.enabled = False
+        # Started by the app lifespan (start_pool) so importing this module never starts processes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Optional[asyncio.Semaphore] = None
     
     def is_enabled(self) -> bool:
         """Check if voice processing is available"""
@@ -77,8 +84,8 @@ class VoiceProcessingService:
             return audio_data
         
         try:
-            logger.info(f"🎵 Starting audio processing: input size={len(audio_data)} bytes")
-            logger.info(f"🎵 Config: {config.pattern.value} (pitch: {config.pitch}, tempo: {config.tempo})")
+            logger.info("🎵 Starting audio processing: input size=%s bytes", len(audio_data))
+            logger.info("🎵 Config: %s (pitch: %s, tempo: %s)", config.pattern.value, config.pitch, config.tempo)
             
             # Try pydub conversion first (requires ffmpeg)
             try:
@@ -105,12 +112,12 @@ class VoiceProcessingService:
                     # Load converted WAV with librosa
                     logger.info("🎵 Loading audio with librosa")
                     y, sr = self.librosa.load(temp_converted_path, sr=None)
-                    logger.info(f"🎵 Loaded audio: length={len(y)} samples, sr={sr}Hz")
+                    logger.info("🎵 Loaded audio: length=%s samples, sr=%sHz", len(y), sr)
                     
                     # Apply pitch and tempo modifications
-                    logger.info(f"🎵 Applying effects: pitch={config.pitch}, tempo={config.tempo}")
+                    logger.info("🎵 Applying effects: pitch=%s, tempo=%s", config.pitch, config.tempo)
                     processed_audio = self._apply_librosa_effects(y, sr, config.pitch, config.tempo)
-                    logger.info(f"🎵 Effects applied: output length={len(processed_audio)} samples")
+                    logger.info("🎵 Effects applied: output length=%s samples", len(processed_audio))
                     
                     # Save processed audio as WAV (fallback format)
                     logger.info("🎵 Saving processed audio as WAV")
@@ -120,7 +127,7 @@ class VoiceProcessingService:
                     with open(temp_output_path, 'rb') as f:
                         processed_bytes = f.read()
                     
-                    logger.info(f"🎵 ✅ Audio processing complete: output size={len(processed_bytes)} bytes (WAV)")
+                    logger.info("🎵 ✅ Audio processing complete: output size=%s bytes (WAV)", len(processed_bytes))
                     return processed_bytes
                     
                 finally:
@@ -132,7 +139,7 @@ class VoiceProcessingService:
                             pass
             
             except Exception as format_error:
-                logger.warning(f"🎵 ⚠️  Audio format conversion failed (likely missing ffmpeg): {format_error}")
+                logger.warning("🎵 ⚠️  Audio format conversion failed (likely missing ffmpeg): %s", format_error)
                 logger.info("🎵 🔄 Falling back to raw audio processing...")
                 
                 # Fallback: Try to process as raw audio data
@@ -147,7 +154,7 @@ class VoiceProcessingService:
                     
                     # Use default sample rate for processing
                     sr = 22050
-                    logger.info(f"🎵 Processing raw audio: {len(audio_normalized)} samples at {sr}Hz")
+                    logger.info("🎵 Processing raw audio: %s samples at %sHz", len(audio_normalized), sr)
                     
                     # Apply effects
                     processed_audio = self._apply_librosa_effects(audio_normalized, sr, config.pitch, config.tempo)
@@ -156,19 +163,57 @@ class VoiceProcessingService:
                     processed_int16 = (processed_audio * 32767).astype(np.int16)
                     processed_bytes = processed_int16.tobytes()
                     
-                    logger.info(f"🎵 ✅ Raw audio processing complete: output size={len(processed_bytes)} bytes")
+                    logger.info("🎵 ✅ Raw audio processing complete: output size=%s bytes", len(processed_bytes))
                     return processed_bytes
                     
                 except Exception as raw_error:
-                    logger.error(f"🎵 ❌ Raw audio processing also failed: {raw_error}")
+                    logger.error("🎵 ❌ Raw audio processing also failed: %s", raw_error)
                     # Return original audio as last resort
                     return audio_data
             
         except Exception as e:
-            logger.error(f"🎵 ❌ Voice processing failed completely: {e}", exc_info=True)
+            logger.error("🎵 ❌ Voice processing failed completely: %s", e, exc_info=True)
             # Return original audio on error
             return audio_data
     
+    async def process_audio_async(self, audio_data: bytes, config: VoiceProcessingConfig) -> Optional[bytes]:
+        """
+        Run process_audio off the event loop.
+        
+        Uses a process pool (settings.VOICE_PROCESSING_WORKERS) so concurrent speakers
+        use separate cores; at most settings.VOICE_PROCESSING_MAX_PENDING clips are
+        submitted at once.
+        
+        Returns:
+            Processed audio data as bytes, or None if the original audio would be
+            returned unchanged (processing unavailable or failed)
+        """
+        if self._pending is None:
+            self._pending = asyncio.Semaphore(settings.VOICE_PROCESSING_MAX_PENDING)
+        async with self._pending:
+            loop = asyncio.get_running_loop()
+            # Without a started pool (workers set to 0, or no app lifespan) use a thread
+            return await loop.run_in_executor(self._pool, _process_audio_if_changed, audio_data, config)
+    
+    def start_pool(self) -> None:
+        """Start the worker processes for process_audio_async
+        
+        Workers are spawned rather than forked so they don't inherit the running
+        server's event loop, sockets and database connections.
+        """
+        if self._pool is None and self.enabled and settings.VOICE_PROCESSING_WORKERS > 0:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.VOICE_PROCESSING_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("🎵 Voice processing pool started with %d workers", settings.VOICE_PROCESSING_WORKERS)
+    
+    def shutdown_pool(self) -> None:
+        """Stop the worker processes, dropping clips that have not started yet"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+    
     def _apply_librosa_effects(self, y: np.ndarray, sr: int, pitch: float, tempo: float) -> np.ndarray:
         """
         Apply pitch and tempo modifications using librosa.
@@ -193,7 +238,7 @@ class VoiceProcessingService:
                     n_steps=pitch,
                     bins_per_octave=12
                 )
-                logger.debug(f"Applied pitch shift: {pitch} semitones")
+                logger.debug("Applied pitch shift: %s semitones", pitch)
             
             # Apply tempo change if needed
             if abs(tempo - 1.0) > 0.05:  # Only apply if tempo change is significant
@@ -201,12 +246,12 @@ class VoiceProcessingService:
                     processed_audio, 
                     rate=tempo
                 )
-                logger.debug(f"Applied tempo change: {tempo}x")
+                logger.debug("Applied tempo change: %sx", tempo)
             
             return processed_audio
             
         except Exception as e:
-            logger.error(f"Librosa audio processing failed: {e}")
+            logger.error("Librosa audio processing failed: %s", e)
             # Return original audio on error
             return y
     
@@ -216,4 +261,15 @@ class VoiceProcessingService:
         return f"{config.description} (pitch: {config.pitch:+.1f}, tempo: {config.tempo:.1f}x)"
 
 # Global instance
-voice_processing_service = VoiceProcessingService()
\ No newline at end of file
+voice_processing_service = VoiceProcessingService()
+
+def _process_audio_if_changed(audio_data: bytes, config: VoiceProcessingConfig) -> Optional[bytes]:
+    """Executor entry point; returns None instead of the unchanged input buffer
+    
+    Runs on the worker process's own service instance when used with the process pool.
+    """
+    processed = voice_processing_service.process_audio(audio_data, config)
+    # process_audio hands back the input object itself when it falls back
+    if not processed or processed is audio_data:
+        return None
+    return processed
\ No newline at end of file
@@ -0,0 +1,177 @@
+import asyncio
+import functools
+import socketio
+import weakref
+from typing import Dict, List, Set
+from logging import getLogger
+import services as _services
+from config import settings
+from sockets.payloads import ERR_INTERNAL
+
+logger = getLogger(__name__)
+
+# Fallback store, imported on first use when main.py hasn't installed one
+_fallback_state_store = None
+def get_state_store():
+    """Get the state store installed on services, falling back to the global instance"""
+    global _fallback_state_store
+    store = _services.state_store
+    if store is not None:
+        return store
+    if _fallback_state_store is None:
+        # Fallback to the global instance if not properly initialized
+        from services.state_store import state_store as global_state_store
+        logger.warning("Using fallback global state_store")
+        _fallback_state_store = global_state_store
+    return _fallback_state_store
+
+class GameSocketBase:
+    """Connection handling shared by the Socket.IO event handler classes
+    
+    Subclasses register their game events in setup_events() after calling super().
+    """
+    
+    def __init__(self, sio: socketio.AsyncServer):
+        self.sio = sio
+        # 初期化時にsioがNoneでないことを確認
+        if self.sio is None:
+            raise ValueError("SocketIO server instance cannot be None")
+        self._state_store = None
+        # Bound once; every broadcast in the handlers goes through it
+        self._emit = sio.emit
+        # With the default in-process client manager every socket of a room is in this
+        # process, so the local sid index can tell when a broadcast has no audience.
+        # Any other manager (Redis pub/sub) may have listeners on other instances.
+        self._local_fanout = type(getattr(sio, 'manager', None)) is socketio.AsyncManager
+        # Emit to the requesting sid: its connection lives in this process, so a
+        # Redis client manager need not publish the packet through the queue
+        self._reply = functools.partial(sio.emit, ignore_queue=True)
+        # Room id -> disconnects waiting for the batched broadcast, and its flush task
+        self._pending_disconnects: Dict[str, List[Dict[str, str]]] = {}
+        self._disconnect_flush_tasks: Dict[str, asyncio.Task] = {}
+        # Room id -> lock, dropped once no coroutine holds or waits on it
+        self._room_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # Sids bound to a host player; host-only events reject other sids without reading the room
+        self._host_sids: Set[str] = set()
+        self.setup_events()
+    
+    def _lock_for(self, room_id: str) -> asyncio.Lock:
+        """Get the lock serializing read-modify-write sequences on a room"""
+        lock = self._room_locks.get(room_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._room_locks[room_id] = lock
+        return lock
+    
+    @property
+    def local_fanout(self) -> bool:
+        """Whether every socket of a room is connected to this process"""
+        return self._local_fanout
+    
+    def _get_state_store(self):
+        """Resolve the state store (override to inject another store)"""
+        return get_state_store()
+    
+    @property
+    def state_store(self):
+        """State store, cached once main.py has installed one"""
+        store = self._state_store
+        if store is None:
+            store = self._get_state_store()
+            if _services.state_store is not None:
+                self._state_store = store
+        return store
+    
+    def handles_errors(self, handler):
+        """Decorate an event handler so an unexpected error is reported as EMO-500
+        
+        The traceback is logged and the error emitted before the handler returns,
+        so the report reaches the client ahead of replies to its later events.
+        """
+        @functools.wraps(handler)
+        async def wrapper(sid, *args):
+            try:
+                return await handler(sid, *args)
+            except Exception as e:
+                await self._report_handler_error(handler.__name__, sid, e)
+        return wrapper
+    
+    async def _report_handler_error(self, handler_name: str, sid: str, error: Exception):
+        logger.error("Error in %s: %s", handler_name, error, exc_info=error)
+        try:
+            await self._reply('error', ERR_INTERNAL, room=sid)
+        except Exception as e:
+            logger.error("Error reporting %s failure to %s: %s", handler_name, sid, e)
+    
+    def setup_events(self):
+        """Register connect/disconnect handlers"""
+        
+        @self.sio.event
+        async def connect(sid, environ):
+            logger.info("Client connected: %s", sid)
+            await self._reply('connected', {'message': 'Connected to EMOGUCHI server'}, room=sid)
+        
+        @self.sio.event
+        async def disconnect(sid):
+            logger.info("Client disconnected: %s", sid)
+            # Handle player disconnection
+            await self._handle_player_disconnect(sid)
+    
+    async def _handle_player_disconnect(self, sid: str):
+        """Handle player disconnection"""
+        state_store = self.state_store
+        room_id, player_id = state_store.lookup_sid(sid)
+        state_store.unbind_sid(sid)
+        self._host_sids.discard(sid)
+        if not room_id or not player_id:
+            return
+        if any(state_store.lookup_sid(other_sid)[0] == room_id
+               for other_sid in state_store.player_sids.get(player_id, ())):
+            # The player is still in the room from another socket
+            return
+        
+        # Only the store and the broadcast can fail; the lookups above are in memory
+        try:
+            # Serialize with restarts and other disconnects of this room (no lost updates)
+            async with self._lock_for(room_id):
+                room = await state_store.get_room(room_id)
+                player = room.players.get(player_id) if room else None
+                # Already marked disconnected (repeated disconnect): nothing to write or announce
+                if player and room.set_player_connected(player, False):
+                    if settings.BATCH_DISCONNECT_EVENTS:
+                        # Coalesce the write and the announcement with other disconnects
+                        state_store.mark_dirty(room)
+                        self._queue_disconnect(room_id, player.name, player_id)
+                    elif self._local_fanout and not state_store.room_sids(room_id):
+                        # No sockets left in the room to notify
+                        await state_store.update_room(room)
+                    else:
+                        await asyncio.gather(
+                            state_store.update_room(room),
+                            self._emit('player_disconnected', {
+                                'playerName': player.name,
+                                'playerId': player_id
+                            }, room=room_id)
+                        )
+        except Exception as e:
+            logger.error("Error handling disconnect: %s", e)
+    
+    def _queue_disconnect(self, room_id: str, player_name: str, player_id: str):
+        pending = self._pending_disconnects.setdefault(room_id, [])
+        pending.append({'playerName': player_name, 'playerId': player_id})
+        if room_id not in self._disconnect_flush_tasks:
+            self._disconnect_flush_tasks[room_id] = asyncio.create_task(self._flush_disconnects(room_id))
+    
+    async def _flush_disconnects(self, room_id: str):
+        """Announce a room's queued disconnects in one players_disconnected event"""
+        try:
+            await asyncio.sleep(settings.DISCONNECT_BATCH_WINDOW)
+        finally:
+            # Disconnects after this point start a new batch
+            del self._disconnect_flush_tasks[room_id]
+            players = self._pending_disconnects.pop(room_id, [])
+        if players and (not self._local_fanout or self.state_store.room_sids(room_id)):
+            try:
+                await self._emit('players_disconnected', {'players': players}, room=room_id)
+            except Exception as e:
+                logger.error("Error announcing disconnects in room %s: %s", room_id, e)
@@ -1,75 +1,73 @@
-import socketio
+import asyncio
 from typing import Dict, Any
 from datetime import datetime, timezone
-from models.game import Player, GamePhase, Round, AudioRecording
-from logging import getLogger
+from models.game import Player, GamePhase, Room, Round, AudioRecording
+from models.emotion import EMOTION_ID_TO_NAME_JA, get_voting_choice_data
+from config import settings
+from services.llm_service import llm_service
+from services.voice_processing_service import voice_processing_service
+from sockets.base import GameSocketBase
+from sockets.payloads import (
+    player_room, err_not_waiting, make_player_change, make_room_state, make_round_start,
+    ERR_HOST_ONLY_RESTART, ERR_HOST_ONLY_START, ERR_INVALID_ROUND,
+    ERR_JOINED_AFTER_ROUND_START, ERR_MISSING_JOIN_DATA, ERR_NOT_AUTHENTICATED,
+    ERR_NOT_ENOUGH_PLAYERS, ERR_NO_ACTIVE_ROUND, ERR_NO_AUDIO,
+    ERR_NO_PLAYERS, ERR_ROOM_NOT_FOUND, ERR_SPEAKER_CANNOT_VOTE,
+    ERR_SPEAKER_ONLY_AUDIO
+)
+from logging import getLogger, INFO
 
 logger = getLogger(__name__)
 
-def get_state_store():
-    """Dynamically get the state store to avoid circular imports"""
-    import services
-    if services.state_store is None:
-        # Fallback to the global instance if not properly initialized
-        from services.state_store import state_store as global_state_store
-        logger.warning("Using fallback global state_store")
-        return global_state_store
-    logger.info(f"Getting state_store: {services.state_store}")
-    logger.info(f"State store type: {type(services.state_store)}")
-    return services.state_store
-
-class GameSocketEvents:
-    def __init__(self, sio: socketio.AsyncServer):
-        self.sio = sio
-        # 初期化時にsioがNoneでないことを確認
-        if self.sio is None:
-            raise ValueError("SocketIO server instance cannot be None")
-        self.setup_events()
+class GameSocketEvents(GameSocketBase):
+    # Number of recently completed round ids remembered to reject duplicate completions
+    COMPLETED_ROUNDS_KEPT = 256
+    
+    def __init__(self, sio):
+        # Round ids already completed (or being completed) in this process, oldest first
+        self._completed_rounds: Dict[str, None] = {}
+        super().__init__(sio)
+    
+    def _claim_round_completion(self, round_id: str) -> bool:
+        """Mark a round as completing. Returns False if it was already claimed
+        
+        Handlers run concurrently, so the last vote and the vote timeout can both
+        try to complete a round (with a database store, on separate Room copies).
+        """
+        if round_id in self._completed_rounds:
+            return False
+        self._completed_rounds[round_id] = None
+        if len(self._completed_rounds) > self.COMPLETED_ROUNDS_KEPT:
+            del self._completed_rounds[next(iter(self._completed_rounds))]
+        return True
     
     def setup_events(self):
         """Register all socket event handlers"""
-        
-        # Capture self in local scope to avoid closure issues
-        events_instance = self
-        
-        @self.sio.event
-        async def connect(sid, environ):
-            logger.info(f"Client connected: {sid}")
-            await events_instance.sio.emit('connected', {'message': 'Connected to EMOGUCHI server'}, room=sid)
-        
-        @self.sio.event
-        async def disconnect(sid):
-            logger.info(f"Client disconnected: {sid}")
-            # Handle player disconnection
-            await events_instance._handle_player_disconnect(sid)
+        super().setup_events()
         
         @self.sio.event
+        @self.handles_errors
         async def join_room(sid, data):
             """Handle player joining a room"""
-            try:
-                logger.info(f"join_room event received from {sid} with data: {data}")
-                room_id = data.get('roomId')
-                player_name = data.get('playerName')
-                player_id = data.get('playerId')  # 永続化されたPlayer ID
-                
-                if not room_id or not player_name:
-                    logger.error(f"Missing data - roomId: {room_id}, playerName: {player_name}")
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-400',
-                        'message': 'Missing roomId or playerName'
-                    }, room=sid)
-                    return
-                
-                state_store = get_state_store()
-                logger.info(f"Searching for room: {room_id}")
+            logger.info("join_room event received from %s with data: %s", sid, data)
+            room_id = data.get('roomId')
+            player_name = data.get('playerName')
+            player_id = data.get('playerId')  # 永続化されたPlayer ID
+            
+            if not room_id or not player_name:
+                logger.error("Missing data - roomId: %s, playerName: %s", room_id, player_name)
+                await self._reply('error', ERR_MISSING_JOIN_DATA, room=sid)
+                return
+            
+            state_store = self.state_store
+            logger.info("Searching for room: %s", room_id)
+            # Serialize with other events of this room (no lost updates)
+            async with self._lock_for(room_id):
                 room = await state_store.get_room(room_id)
-                logger.info(f"Room found: {room is not None}")
+                logger.info("Room found: %s", room is not None)
                 
                 if not room:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-404',
-                        'message': 'Room not found'
-                    }, room=sid)
+                    await self._reply('error', ERR_ROOM_NOT_FOUND, room=sid)
                     return
                 
                 # Check if player already exists (by ID or name for backward compatibility)
@@ -79,23 +77,22 @@ class GameSocketEvents:
                 if player_id:
                     existing_player = room.players.get(player_id)
                     if existing_player:
-                        logger.info(f"Found existing player by ID: {player_id}")
+                        logger.info("Found existing player by ID: %s", player_id)
                         # Update name if changed
-                        existing_player.name = player_name
+                        if existing_player.name != player_name:
+                            room.rename_player(existing_player, player_name)
                 
                 # Fallback: check by name for backward compatibility
                 if not existing_player:
-                    for p in room.players.values():
-                        if p.name == player_name:
-                            existing_player = p
-                            logger.info(f"Found existing player by name: {player_name}")
-                            break
+                    existing_player = room.find_player_by_name(player_name)
+                    if existing_player:
+                        logger.info("Found existing player by name: %s", player_name)
                 
                 if existing_player:
                     # Reconnect existing player
                     player = existing_player
-                    player.is_connected = True
-                    logger.info(f"Player {player.name} ({player.id}) reconnected to room {room_id}")
+                    room.set_player_connected(player, True)
+                    logger.info("Player %s (%s) reconnected to room %s", player.name, player.id, room_id)
                 else:
                     # Create new player with provided ID or generate new one
                     if player_id:
@@ -105,41 +102,33 @@ class GameSocketEvents:
                     
                     if not room.players:  # First player becomes host
                         player.is_host = True
-                    room.players[player.id] = player
+                    room.add_player(player)
                 
-                state_store = get_state_store()
                 await state_store.update_room(room)
                 
-                # Join socket room
-                try:
-                    await events_instance.sio.enter_room(sid, room_id)
-                except Exception as e:
-                    logger.error(f"Error joining socket room: {e}")
+                # Join socket room and the player's private room. python-socketio 5.9 (pinned)
+                # enters rooms synchronously; later releases return coroutines, awaited together
+                entering = (self.sio.enter_room(sid, room_id), self.sio.enter_room(sid, player_room(player.id)))
+                await asyncio.gather(*[step for step in entering if step is not None])
                 
-                # Store player-room mapping
-                try:
-                    await events_instance.sio.save_session(sid, {
-                        'player_id': player.id,
-                        'room_id': room_id
-                    })
-                except Exception as e:
-                    logger.error(f"Error saving session: {e}")
-                
-                # Notify room about player
-                if existing_player:
-                    await events_instance.sio.emit('player_reconnected', {
-                        'playerName': player.name,
-                        'playerId': player.id
-                    }, room=room_id)
+                # Store player-room mapping (handlers resolve sids through the
+                # state store, so no Socket.IO session is kept)
+                state_store.bind_sid(player.id, sid, room_id)
+                if player.is_host:
+                    self._host_sids.add(sid)
                 else:
-                    await events_instance.sio.emit('player_joined', {
+                    self._host_sids.discard(sid)
+                
+                # The join is announced through room_state's change field
+                change = make_player_change('reconnected' if existing_player else 'joined', player.name, player.id)
+                if settings.SPLIT_PLAYER_EVENTS:
+                    await self._emit(f"player_{change['type']}", {
                         'playerName': player.name,
                         'playerId': player.id
                     }, room=room_id)
                 
                 # Send current room state
                 # Include player scores in the room state
-                players_data = [{'name': p.name, 'score': p.score} for p in room.players.values()]
                 current_speaker = None
                 
                 if room.current_round and room.phase == GamePhase.IN_ROUND:
@@ -147,247 +136,144 @@ class GameSocketEvents:
                     if speaker:
                         current_speaker = speaker.name
                 
-                await events_instance.sio.emit('room_state', {
-                    'roomId': room.id,
-                    'players': players_data,
-                    'phase': room.phase,
-                    'config': room.config.model_dump(),
-                    'currentSpeaker': current_speaker
-                }, room=room_id)
-                
-            except Exception as e:
-                logger.error(f"Error in join_room: {e}", exc_info=True)
-                await events_instance.sio.emit('error', {
-                    'code': 'EMO-500',
-                    'message': f'Internal server error: {str(e)}'
-                }, room=sid)
+                await self._emit('room_state', make_room_state(room, current_speaker, change), room=room_id)
         
         @self.sio.event
+        @self.handles_errors
         async def start_round(sid, data):
             """Start a new round (host only)"""
-            try:
-                session = await events_instance.sio.get_session(sid)
-                room_id = session.get('room_id')
-                player_id = session.get('player_id')
-                
-                if not room_id or not player_id:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-401',
-                        'message': 'Not authenticated'
-                    }, room=sid)
-                    return
-                
-                state_store = get_state_store()
+            state_store = self.state_store
+            room_id, player_id = state_store.lookup_sid(sid)
+            
+            if not room_id or not player_id:
+                await self._reply('error', ERR_NOT_AUTHENTICATED, room=sid)
+                return
+            if sid not in self._host_sids:
+                # Not a host's socket; reject without reading the room
+                await self._reply('error', ERR_HOST_ONLY_START, room=sid)
+                return
+            
+            # Serialize with other events of this room (a repeated start must see IN_ROUND)
+            async with self._lock_for(room_id):
                 room = await state_store.get_room(room_id)
                 if not room:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-404',
-                        'message': 'Room not found'
-                    }, room=sid)
+                    await self._reply('error', ERR_ROOM_NOT_FOUND, room=sid)
                     return
                 
                 player = room.players.get(player_id)
                 if not player or not player.is_host:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-403',
-                        'message': 'Only host can start rounds'
-                    }, room=sid)
+                    await self._reply('error', ERR_HOST_ONLY_START, room=sid)
                     return
                 
                 if room.phase != GamePhase.WAITING:
-                    logger.warning(f"Room {room_id} is in phase {room.phase}, not WAITING. Refusing to start round.")
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-409',
-                        'message': f'Room is not in waiting phase (current: {room.phase})'
-                    }, room=sid)
+                    logger.warning("Room %s is in phase %s, not WAITING. Refusing to start round.", room_id, room.phase)
+                    await self._reply('error', err_not_waiting(room.phase), room=sid)
                     return
                 
                 # Check minimum player count (need at least 2 players: 1 speaker + 1 listener)
                 if len(room.players) < 2:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-400',
-                        'message': 'Need at least 2 players to start the game'
-                    }, room=sid)
+                    await self._reply('error', ERR_NOT_ENOUGH_PLAYERS, room=sid)
                     return
                 
                 # Generate phrase and emotion with LLM
-                from services.llm_service import llm_service
                 phrase, emotion_id = await llm_service.generate_phrase_with_emotion(room.config.mode, room.config.vote_type)
                 
                 # Get current speaker
-                logger.info(f"🎤 START_ROUND: room.current_speaker_index BEFORE get_speaker_order = {room.current_speaker_index}")
-                speaker_order = room.get_speaker_order()
                 speaker = room.get_current_speaker()
-                logger.info(f"🎤 Starting round - Speaker index: {room.current_speaker_index}, Speaker: {speaker.name if speaker else 'None'}")
-                logger.info(f"🎤 Speaker order: {speaker_order}")
-                logger.info(f"🎤 Speaker order length: {len(speaker_order)}")
-                logger.info(f"🎤 All players: {[(pid, p.name, p.is_connected) for pid, p in room.players.items()]}")
-                logger.info(f"🎤 Speaker calculation: speaker_order[{room.current_speaker_index} % {len(speaker_order)}] = {speaker_order[room.current_speaker_index % len(speaker_order)] if speaker_order else 'No order'}")
+                # Diagnostics build lists, so skip them entirely when INFO is off
+                if logger.isEnabledFor(INFO):
+                    speaker_order = room.get_speaker_order()
+                    logger.info("🎤 Starting round - Speaker index: %d, Speaker: %s", room.current_speaker_index, speaker.name if speaker else 'None')
+                    logger.info("🎤 Speaker order (%d): %s", len(speaker_order), speaker_order)
+                    logger.info("🎤 All players: %s", [(pid, p.name, p.is_connected) for pid, p in room.players.items()])
                 
                 if not speaker:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-400',
-                        'message': 'No players available'
-                    }, room=sid)
+                    await self._reply('error', ERR_NO_PLAYERS, room=sid)
                     return
                 
                 # Create round with eligible voters snapshot
                 # Only connected players at round start (excluding speaker) can vote
+                connected_ids = room.connected_player_ids
                 eligible_voters = [
-                    player_id for player_id, player in room.players.items()
-                    if player.is_connected and player_id != speaker.id
+                    player_id for player_id in room.players
+                    if player_id in connected_ids and player_id != speaker.id
                 ]
                 
                 round_data = Round(
                     phrase=phrase,
                     emotion_id=emotion_id,
                     speaker_id=speaker.id,
-                    eligible_voters=eligible_voters
+                    eligible_voters=eligible_voters,
+                    expected_votes=len(eligible_voters)
                 )
                 
-                logger.info(f"🎯 Round created with {len(eligible_voters)} eligible voters: {eligible_voters}")
+                logger.info("🎯 Round created with %s eligible voters: %s", len(eligible_voters), eligible_voters)
                 
                 room.current_round = round_data
                 room.phase = GamePhase.IN_ROUND
-                state_store = get_state_store()
-                await state_store.update_room(room)
-                
-                # Send updated room state to all players to sync phase first
-                # Include player scores in the room state
-                players_data = [{'name': p.name, 'score': p.score} for p in room.players.values()]
-                await events_instance.sio.emit('room_state', {
-                    'roomId': room.id,
-                    'players': players_data,
-                    'phase': room.phase,
-                    'config': room.config.model_dump(),
-                    'currentSpeaker': speaker.name
-                }, room=room_id)
                 
                 # Generate voting choices for this round
-                logger.info(f"🎯 Room config for voting: {room.config.dict()}")
-                from models.emotion import get_emotion_choices_for_voting
-                choice_data = []
-                if room.config.vote_type != "wheel":
-                    if room.config.vote_type == "8choice":
-                        logger.info(f"🎯 Using 8-choice voting")
-                        voting_choices = get_emotion_choices_for_voting(room.config.mode, emotion_id, 8, room.config.vote_type)
-                    else:
-                        logger.info(f"🎯 Using 4-choice voting (vote_type: {room.config.vote_type})")
-                        voting_choices = get_emotion_choices_for_voting(room.config.mode, emotion_id, 4, room.config.vote_type)
-                    
-                    choice_data = [{"id": choice.id, "name": choice.name_ja} for choice in voting_choices]
-                    logger.info(f"🎯 Generated {len(choice_data)} voting choices: {[c['name'] for c in choice_data]}")
-                
-                # Send round start to all players with voting choices
-                await events_instance.sio.emit('round_start', {
-                    'roundId': round_data.id,
-                    'phrase': phrase,
-                    'speakerName': speaker.name,
-                    'votingChoices': choice_data
-                }, room=room_id)
+                choice_data = get_voting_choice_data(room.config.mode, emotion_id, room.config.vote_type)
+                logger.info("🎯 Generated %d voting choices (vote_type: %s)", len(choice_data), room.config.vote_type)
                 
                 # Send speaker-specific data (emotion) only to the speaker
-                emotion_name = emotion_id  # fallback
-                
-                if room.config.vote_type == "wheel":
-                    # For wheel mode, use 3-layer emotions
-                    from models.emotion_3_layer import EMOTIONS_3_LAYER
-                    emotion_data = EMOTIONS_3_LAYER.get(emotion_id)
-                    if emotion_data:
-                        emotion_name = emotion_data.name_ja  # 日本語のみ
-                else:
-                    # For traditional modes
-                    from models.emotion import BASIC_EMOTIONS, ADVANCED_EMOTIONS
-                    emotions_dict = BASIC_EMOTIONS if room.config.mode == "basic" else ADVANCED_EMOTIONS
-                    emotion_data = emotions_dict.get(emotion_id)
-                    if emotion_data:
-                        emotion_name = emotion_data.name_ja  # 日本語のみ
-                
-                # スピーカーに感情情報を送信（全ルームメンバーに送信し、フロントエンドで制御）
-                await events_instance.sio.emit('speaker_emotion', {
-                    'emotion': emotion_name,
-                    'emotionId': emotion_id,
-                    'speakerId': speaker.id  # スピーカーIDを追加してフロントエンドで判定
-                }, room=room_id)
-                
-                logger.info(f"Round started in room {room_id}: {phrase} with emotion {emotion_name}")
+                emotion_name = EMOTION_ID_TO_NAME_JA.get(emotion_id, emotion_id)  # 日本語のみ
+                
+                # Persist the round and send room state (phase sync) and round start
+                # with voting choices to all players, and the emotion only to the
+                # speaker's own sids. None of these waits on another, so run them
+                # together; the emits are queued in this order per socket.
+                if not state_store.player_sids.get(speaker.id):
+                    logger.warning("No connected sessions for speaker %s", speaker.id)
+                await asyncio.gather(
+                    state_store.update_room(room),
+                    self._emit('room_state', make_room_state(room, speaker.name), room=room_id),
+                    self._emit('round_start', make_round_start(round_data.id, phrase, speaker.name, choice_data), room=room_id),
+                    self._emit('speaker_emotion', {
+                        'emotion': emotion_name,
+                        'emotionId': emotion_id,
+                        'speakerId': speaker.id
+                    }, room=player_room(speaker.id))
+                )
                 
-            except Exception as e:
-                logger.error(f"Error in start_round: {e}", exc_info=True)
-                await events_instance.sio.emit('error', {
-                    'code': 'EMO-500',
-                    'message': f'Internal server error: {str(e)}'
-                }, room=sid)
+                logger.info("Round started in room %s: %s with emotion %s", room_id, phrase, emotion_name)
         
         @self.sio.event
+        @self.handles_errors
         async def audio_send(sid, data):
             """Handle audio data from speaker"""
-            logger.info(f"🔥 audio_send event received from sid: {sid}")
-            logger.info(f"🔥 audio_send data keys: {list(data.keys()) if isinstance(data, dict) else 'not dict'}")
+            state_store = self.state_store
+            room_id, player_id = state_store.lookup_sid(sid)
+            logger.debug("🔥 audio_send from sid %s (room %s, player %s)", sid, room_id, player_id)
             
-            try:
-                session = await events_instance.sio.get_session(sid)
-                logger.info(f"🔥 Session data: {session}")
-                
-                room_id = session.get('room_id')
-                player_id = session.get('player_id')
-                
-                logger.info(f"🔥 Extracted room_id: {room_id}, player_id: {player_id}")
-                
-                if not room_id or not player_id:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-401',
-                        'message': 'Not authenticated'
-                    }, room=sid)
-                    return
-                
-                state_store = get_state_store()
-                logger.info(f"Getting state_store: {state_store}")
-                logger.info(f"State store type: {type(state_store)}")
+            if not room_id or not player_id:
+                await self._reply('error', ERR_NOT_AUTHENTICATED, room=sid)
+                return
+            
+            # Serialize with other events of this room while the round is checked and updated
+            async with self._lock_for(room_id):
                 room = await state_store.get_room(room_id)
                 if not room or not room.current_round:
-                    logger.error(f"🚨 audio_send: No active round - room exists: {room is not None}, current_round: {room.current_round if room else None}")
+                    logger.error("🚨 audio_send: No active round - room exists: %s, current_round: %s", room is not None, room.current_round if room else None)
                     if room:
-                        logger.error(f"🚨 audio_send: Room phase: {room.phase}, round_history length: {len(room.round_history)}")
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-404',
-                        'message': 'No active round'
-                    }, room=sid)
+                        logger.error("🚨 audio_send: Room phase: %s, round_history length: %s", room.phase, len(room.round_history))
+                    await self._reply('error', ERR_NO_ACTIVE_ROUND, room=sid)
                     return
                 
                 # Verify that sender is the current speaker
                 if room.current_round.speaker_id != player_id:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-403',
-                        'message': 'Only the speaker can send audio'
-                    }, room=sid)
+                    await self._reply('error', ERR_SPEAKER_ONLY_AUDIO, room=sid)
                     return
                 
                 # Create audio recording
                 audio_data = data.get('audio')
                 if not audio_data:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-400',
-                        'message': 'No audio data provided'
-                    }, room=sid)
+                    await self._reply('error', ERR_NO_AUDIO, room=sid)
                     return
                 
-                logger.info(f"Received audio data, type: {type(audio_data)}, size: {len(audio_data) if hasattr(audio_data, '__len__') else 'unknown'}")
-                
-                # Get emotion info
-                from models.emotion import BASIC_EMOTIONS, ADVANCED_EMOTIONS
-                emotion_acted = room.current_round.emotion_id
-                emotion_name = emotion_acted
+                logger.debug("Received audio data, type: %s", type(audio_data).__name__)
                 
-                for emotion_info in BASIC_EMOTIONS.values():
-                    if emotion_info.id == emotion_acted:
-                        emotion_name = emotion_info.name_ja
-                        break
-                else:
-                    for emotion_info in ADVANCED_EMOTIONS.values():
-                        if emotion_info.id == emotion_acted:
-                            emotion_name = emotion_info.name_ja
-                            break
+                round_id = room.current_round.id
                 
                 # Convert audio data to bytes if needed
                 if isinstance(audio_data, (list, tuple)):
@@ -405,318 +291,253 @@ class GameSocketEvents:
                     emotion_acted=room.current_round.emotion_id
                 )
                 
-                state_store = get_state_store()
                 await state_store.save_audio_recording(recording)
-                logger.info(f"Audio recording saved with ID: {recording.id}")
+                logger.info("Audio recording saved with ID: %s", recording.id)
                 
-                # Update round with audio recording ID
+                # Update round with audio recording ID (written together with the
+                # voting timer below, or by the deferred flush if that never happens)
                 room.current_round.audio_recording_id = recording.id
-                state_store = get_state_store()
-                await state_store.update_room(room)
-                
-                # Apply voice processing if hard mode is enabled
-                processed_audio = audio_data  # Default to original audio
-                logger.info(f"🎯 Hard mode check: room.config.hard_mode = {room.config.hard_mode}")
-                
-                if room.config.hard_mode:
-                    logger.info("🎯 Hard mode is ON - attempting voice processing")
-                    try:
-                        from services.voice_processing_service import voice_processing_service
-                        logger.info(f"🎯 Voice processing service enabled: {voice_processing_service.is_enabled()}")
+                state_store.mark_dirty(room)
+            
+            # Apply voice processing if hard mode is enabled
+            # Always broadcast bytes so Socket.IO sends a binary attachment
+            # instead of JSON-encoding a list of ints
+            processed_audio = audio_bytes  # Default to original audio
+            is_processed = False
+            
+            if room.config.hard_mode:
+                logger.info("🎯 Hard mode is ON - attempting voice processing")
+                try:
+                    if voice_processing_service.is_enabled():
+                        # Select processing pattern based on emotion
+                        processing_config = voice_processing_service.select_processing_pattern(
+                            room.current_round.emotion_id
+                        )
                         
-                        if voice_processing_service.is_enabled():
-                            # Select processing pattern based on emotion
-                            processing_config = voice_processing_service.select_processing_pattern(
-                                room.current_round.emotion_id
-                            )
-                            logger.info(f"🎯 Selected processing config: {processing_config.pattern.value}, pitch={processing_config.pitch}, tempo={processing_config.tempo}")
-                            
-                            # Process the audio
-                            logger.info(f"🎯 Processing audio: input size={len(audio_bytes)} bytes")
-                            processed_audio_bytes = voice_processing_service.process_audio(
-                                audio_bytes, processing_config
-                            )
+                        # Process the audio
+                        # librosa processing is CPU-bound; run it in the worker pool
+                        processed_audio_bytes = await voice_processing_service.process_audio_async(
+                            audio_bytes, processing_config
+                        )
+                        
+                        if processed_audio_bytes is not None:
+                            processed_audio = processed_audio_bytes
+                            is_processed = True
                             
-                            if processed_audio_bytes and processed_audio_bytes != audio_bytes:
-                                # Convert back to format expected by frontend
-                                if isinstance(audio_data, (list, tuple)):
-                                    processed_audio = list(processed_audio_bytes)
-                                else:
-                                    processed_audio = processed_audio_bytes
-                                
-                                logger.info(f"🎯 ✅ Audio processed successfully with {processing_config.pattern.value}: "
-                                          f"pitch={processing_config.pitch}, tempo={processing_config.tempo}, output size={len(processed_audio_bytes)}")
-                            else:
-                                logger.warning("🎯 ❌ Audio processing failed or returned same audio, using original audio")
+                            logger.info("🎯 ✅ Audio processed with %s: pitch=%s, tempo=%s, %d -> %d bytes",
+                                        processing_config.pattern.value, processing_config.pitch, processing_config.tempo,
+                                        len(audio_bytes), len(processed_audio_bytes))
                         else:
-                            logger.warning("🎯 ❌ Voice processing service not available, using original audio")
-                    except Exception as e:
-                        logger.error(f"🎯 ❌ Voice processing error: {e}", exc_info=True)
-                        # Continue with original audio if processing fails
-                else:
-                    logger.info("🎯 Hard mode is OFF - using original audio")
+                            logger.warning("🎯 ❌ Audio processing failed or returned same audio, using original audio")
+                    else:
+                        logger.warning("🎯 ❌ Voice processing service not available, using original audio")
+                except Exception as e:
+                    logger.error("🎯 ❌ Voice processing error: %s", e, exc_info=True)
+                    # Continue with original audio if processing fails
+            else:
+                logger.info("🎯 Hard mode is OFF - using original audio")
+            
+            # Processing yields to the worker pool, during which a restart, disconnect or
+            # vote timeout may have replaced the room; continue only if the round is current
+            async with self._lock_for(room_id):
+                room = await state_store.get_room(room_id)
+                if not room or not room.current_round or room.current_round.id != round_id:
+                    logger.info("🎯 audio_send: round %s in room %s ended during processing, dropping audio", round_id, room_id)
+                    return
+                room.current_round.audio_recording_id = recording.id
                 
                 # Broadcast audio to all other players in the room
                 # Speaker gets original audio, listeners get processed audio (if hard mode)
                 # Generate UTC timestamp for consistency
                 utc_now = datetime.now(timezone.utc)
                 
-                await events_instance.sio.emit('audio_received', {
+                # bytes go out as a binary attachment; skip every socket of the speaker
+                # (other tabs too) so the clip isn't sent back to them
+                await self._emit('audio_received', {
                     'audio': processed_audio,
                     'speaker_name': room.players[player_id].name,
-                    'is_processed': room.config.hard_mode and processed_audio != audio_data,
+                    'is_processed': is_processed,
                     'vote_timeout_seconds': room.config.vote_timeout,  # タイマー情報を追加
                     'voting_started_at': utc_now.isoformat()  # 開始時刻も送信
-                }, room=room_id, skip_sid=sid)
+                }, room=room_id, skip_sid=list(state_store.player_sids.get(player_id, ())) or sid)
                 
                 # Start voting timer after audio is broadcast
                 room.current_round.voting_started_at = utc_now
                 room.current_round.vote_timeout_seconds = room.config.vote_timeout
                 
-                state_store = get_state_store()
                 await state_store.update_room(room)
-                
-                # Schedule timeout check
-                import asyncio
-                timeout_task = asyncio.create_task(events_instance._check_vote_timeout(room_id, room.current_round.id))
-                logger.info(f"⏰ Timeout task created for round {room.current_round.id} in room {room_id}")
-                
-                logger.info(f"Audio received and broadcast from speaker {player_id} in room {room_id}, data size: {len(audio_bytes)}")
-                logger.info(f"⏰ Vote timer started: {room.config.vote_timeout}s timeout")
-                logger.info(f"⏰ voting_started_at set to: {room.current_round.voting_started_at}")
-                logger.info(f"⏰ Current UTC time: {utc_now}")
-                
-            except Exception as e:
-                logger.error(f"Error in audio_send: {e}", exc_info=True)
-                await events_instance.sio.emit('error', {
-                    'code': 'EMO-500',
-                    'message': f'Internal server error: {str(e)}'
-                }, room=sid)
+            
+            # Schedule timeout check
+            asyncio.create_task(self._check_vote_timeout(room_id, round_id, room.config.vote_timeout))
+            
+            logger.info("Audio (%d bytes) broadcast from speaker %s in room %s; vote timer %ss started at %s",
+                        len(audio_bytes), player_id, room_id, room.config.vote_timeout, utc_now.isoformat())
         
         @self.sio.event
+        @self.handles_errors
         async def submit_vote(sid, data):
             """Submit vote for current round"""
-            try:
-                session = await events_instance.sio.get_session(sid)
-                room_id = session.get('room_id')
-                player_id = session.get('player_id')
-                
-                round_id = data.get('roundId')
-                emotion_id = data.get('emotionId')
-                
-                if not room_id or not player_id:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-401',
-                        'message': 'Not authenticated'
-                    }, room=sid)
-                    return
-                
-                state_store = get_state_store()
+            state_store = self.state_store
+            room_id, player_id = state_store.lookup_sid(sid)
+            
+            round_id = data.get('roundId')
+            emotion_id = data.get('emotionId')
+            
+            if not room_id or not player_id:
+                await self._reply('error', ERR_NOT_AUTHENTICATED, room=sid)
+                return
+            
+            # Serialize with other events of this room (no lost votes or double completion)
+            async with self._lock_for(room_id):
                 room = await state_store.get_room(room_id)
                 if not room or not room.current_round:
-                    logger.error(f"🚨 submit_vote: No active round - room exists: {room is not None}, current_round: {room.current_round if room else None}")
+                    logger.error("🚨 submit_vote: No active round - room exists: %s, current_round: %s", room is not None, room.current_round if room else None)
                     if room:
-                        logger.error(f"🚨 submit_vote: Room phase: {room.phase}, round_history length: {len(room.round_history)}")
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-404',
-                        'message': 'No active round'
-                    }, room=sid)
+                        logger.error("🚨 submit_vote: Room phase: %s, round_history length: %s", room.phase, len(room.round_history))
+                    await self._reply('error', ERR_NO_ACTIVE_ROUND, room=sid)
                     return
                 
                 if room.current_round.id != round_id:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-400',
-                        'message': 'Invalid round ID'
-                    }, room=sid)
+                    await self._reply('error', ERR_INVALID_ROUND, room=sid)
                     return
                 
                 # Don't allow speaker to vote
                 if room.current_round.speaker_id == player_id:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-400',
-                        'message': 'Speaker cannot vote'
-                    }, room=sid)
+                    await self._reply('error', ERR_SPEAKER_CANNOT_VOTE, room=sid)
                     return
                 
                 # Only allow eligible voters (those present at round start) to vote
                 if player_id not in room.current_round.eligible_voters:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-403', 
-                        'message': 'You joined after the round started and cannot vote'
-                    }, room=sid)
+                    await self._reply('error', ERR_JOINED_AFTER_ROUND_START, room=sid)
                     return
                 
+                vote_confirmed = {
+                    'roundId': round_id,
+                    'emotionId': emotion_id,
+                    'message': 'Vote recorded successfully'
+                }
+                previous_vote = room.current_round.votes.get(player_id)
+                if previous_vote == emotion_id:
+                    # Resent vote (e.g. a retry after a dropped confirmation): confirm again, nothing changed
+                    await self._reply('vote_confirmed', vote_confirmed, room=sid)
+                    return
+                if previous_vote is not None:
+                    logger.info("🗳️ %s changed vote in room %s: %s -> %s", player_id, room_id, previous_vote, emotion_id)
+                
                 # Record vote
                 room.current_round.votes[player_id] = emotion_id
-                state_store = get_state_store()
-                await state_store.update_room(room)
+                # Votes are written in batches; _complete_round persists the final state
+                state_store.mark_dirty(room, votes_only=True)
                 
                 # Send vote confirmation to the voter
-                await events_instance.sio.emit('vote_confirmed', {
-                    'roundId': round_id,
-                    'emotionId': emotion_id,
-                    'message': 'Vote recorded successfully'
-                }, room=sid)
+                await self._reply('vote_confirmed', vote_confirmed, room=sid)
                 
                 # Simplified vote completion logic - count all currently connected eligible voters
-                current_connected_eligible = [
-                    voter_id for voter_id in room.current_round.eligible_voters
-                    if voter_id in room.players and room.players[voter_id].is_connected
-                ]
-                
+                # (kept up to date by the Room on connect/disconnect)
                 votes_received = len(room.current_round.votes)
                 total_eligible = len(room.current_round.eligible_voters)
-                connected_eligible = len(current_connected_eligible)
+                connected_eligible = room.expected_vote_count()
                 
-                logger.info(f"🗳️ Vote completion check:")
-                logger.info(f"🗳️   Original eligible voters: {room.current_round.eligible_voters}")
-                logger.info(f"🗳️   Currently connected eligible: {current_connected_eligible}")
-                logger.info(f"🗳️   Votes received: {votes_received}/{connected_eligible} connected ({total_eligible} original)")
-                logger.info(f"🗳️   Actual votes: {room.current_round.votes}")
+                logger.info("🗳️ Vote by %s in room %s: %d/%d connected (%d original)",
+                            player_id, room_id, votes_received, connected_eligible, total_eligible)
                 
                 # Complete round when all currently connected eligible voters have voted
-                should_complete = votes_received >= connected_eligible and connected_eligible > 0
-                logger.info(f"🗳️ Should complete: {should_complete} (votes_received={votes_received} >= connected_eligible={connected_eligible})")
-                
-                if should_complete:
-                    logger.info(f"🎉 All connected eligible voters have voted, completing round in room {room_id}")
-                    await events_instance._complete_round(room)
-                else:
-                    remaining = connected_eligible - votes_received
-                    logger.info(f"⏳ Waiting for {remaining} more votes from connected eligible voters in room {room_id}")
-                
-                logger.info(f"Vote submitted by player {player_id} in room {room_id}")
-                
-            except Exception as e:
-                logger.error(f"Error in submit_vote: {e}", exc_info=True)
-                await events_instance.sio.emit('error', {
-                    'code': 'EMO-500',
-                    'message': f'Internal server error: {str(e)}'
-                }, room=sid)
+                if votes_received >= connected_eligible and connected_eligible > 0:
+                    logger.info("🎉 All connected eligible voters have voted, completing round in room %s", room_id)
+                    await self._complete_round(room)
         
         @self.sio.event
+        @self.handles_errors
         async def restart_game(sid, data):
             """Restart the game (host only)"""
-            logger.info(f"🔄 restart_game event received from {sid} with data: {data}")
-            try:
-                session = await events_instance.sio.get_session(sid)
-                room_id = session.get('room_id')
-                player_id = session.get('player_id')
-                
-                if not room_id or not player_id:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-401',
-                        'message': 'Not authenticated'
-                    }, room=sid)
-                    return
-                
-                state_store = get_state_store()
+            logger.info("🔄 restart_game event received from %s with data: %s", sid, data)
+            state_store = self.state_store
+            room_id, player_id = state_store.lookup_sid(sid)
+            
+            if not room_id or not player_id:
+                await self._reply('error', ERR_NOT_AUTHENTICATED, room=sid)
+                return
+            if sid not in self._host_sids:
+                # Not a host's socket; reject without reading the room
+                await self._reply('error', ERR_HOST_ONLY_RESTART, room=sid)
+                return
+            
+            # Serialize with other restarts and disconnects of this room (no lost updates)
+            async with self._lock_for(room_id):
                 room = await state_store.get_room(room_id)
                 if not room:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-404',
-                        'message': 'Room not found'
-                    }, room=sid)
+                    await self._reply('error', ERR_ROOM_NOT_FOUND, room=sid)
                     return
                 
-                logger.info(f"🔄 Room loaded from DB for restart: {room.config.dict()}")
-                
-                # Double-check database directly
-                try:
-                    from services.database_service import DatabaseService
-                    from models.database import ChatSession
-                    from sqlalchemy import select
-                    
-                    db_service = DatabaseService()
-                    await db_service.initialize()
-                    async with db_service.get_session() as session:
-                        result = await session.execute(select(ChatSession).where(ChatSession.room_code == room_id))
-                        chat_session = result.scalar_one_or_none()
-                        if chat_session:
-                            logger.info(f"🔄 Direct DB check - max_rounds: {chat_session.max_rounds}, vote_type: {chat_session.vote_type}")
-                except Exception as e:
-                    logger.error(f"🔄 DB check failed: {e}")
-                
                 player = room.players.get(player_id)
                 if not player or not player.is_host:
-                    await events_instance.sio.emit('error', {
-                        'code': 'EMO-403',
-                        'message': 'Only host can restart the game'
-                    }, room=sid)
+                    await self._reply('error', ERR_HOST_ONLY_RESTART, room=sid)
                     return
                 
                 # Create new game session instead of resetting current one
-                logger.info(f"🔄 Creating new game session for room {room_id}")
-                logger.info(f"🔄 Current room config before restart: {room.config.dict()}")
+                logger.info("🔄 Creating new game session for room %s", room_id)
+                logger.info("🔄 Current room config before restart: %s", room.config_as_dict())
+                
+                # Copy players in join order (scores are reset on the new room below)
+                logger.info("🔄 Copying %s players to new session", len(room.players))
+                new_players = {
+                    player.id: Player(
+                        id=player.id,  # Keep same player ID
+                        name=player.name,
+                        is_host=player.is_host,
+                        is_connected=player.is_connected
+                    )
+                    for player in room.players.values()
+                }
                 
                 # Create new room with same config and players
-                from models.game import Room, Player
                 new_room = Room(
                     id=room_id,  # Same room ID for Socket.IO compatibility
                     config=room.config,  # Keep current config
-                    players={},  # Will be populated below
+                    players=new_players,
                     phase=GamePhase.WAITING,
                     current_round=None,
                     round_history=[],
                     current_speaker_index=0
                 )
-                
-                # Copy players with reset scores
-                logger.info(f"🔄 Copying {len(room.players)} players to new session")
-                for player in room.players.values():
-                    new_player = Player(
-                        id=player.id,  # Keep same player ID
-                        name=player.name,
-                        is_host=player.is_host,
-                        score=0,  # Reset score
-                        is_connected=player.is_connected
-                    )
-                    new_room.players[player.id] = new_player
+                # Same players in the same order, so the name indexes carry over
+                new_room.inherit_player_indexes(room)
+                # Zero the scores and build the score board the room_state below sends
+                new_room.reset_scores()
                 
                 new_room.reset_speaker_order()  # Initialize speaker order for new game
                 
                 # End current session and create new one
-                state_store = get_state_store()
                 if hasattr(state_store, '_end_current_session_and_create_new'):
                     # Use special method for DatabaseStateStore
-                    await state_store._end_current_session_and_create_new(room, new_room)
+                    store_write = state_store._end_current_session_and_create_new(room, new_room)
                 else:
                     # Fallback for MemoryStateStore
-                    await state_store.update_room(new_room)
+                    store_write = state_store.update_room(new_room)
                 
                 # Update reference for subsequent operations
                 room = new_room
                 
-                # Send updated room state to all players
+                # Send updated room state to all players while the new session is written
                 # Include player scores in the room state (all 0 after restart)
-                players_data = [{'name': p.name, 'score': p.score} for p in room.players.values()]
-                room_state_data = {
-                    'roomId': room.id,
-                    'players': players_data,
-                    'phase': room.phase,
-                    'config': room.config.model_dump(),
-                    'currentSpeaker': None
-                }
-                logger.info(f"🔄 Sending room_state after restart: {room_state_data}")
-                await events_instance.sio.emit('room_state', room_state_data, room=room_id)
-                
-                logger.info(f"🔄 Game restarted in room {room_id}")
+                await asyncio.gather(
+                    store_write,
+                    self._emit('room_state', make_room_state(room, None), room=room_id)
+                )
                 
-            except Exception as e:
-                logger.error(f"Error in restart_game: {e}", exc_info=True)
-                await events_instance.sio.emit('error', {
-                    'code': 'EMO-500',
-                    'message': f'Internal server error: {str(e)}'
-                }, room=sid)
+                logger.info("🔄 Game restarted in room %s", room_id)
     
     async def _complete_round(self, room):
-        """Complete current round and calculate scores"""
+        """Complete current round and calculate scores (the caller holds the room's lock)"""
+        round_data = room.current_round
+        if not round_data:
+            return
+        if not self._claim_round_completion(round_data.id):
+            logger.info("Round %s in room %s is already completed", round_data.id, room.id)
+            return
         try:
-            if not room.current_round:
-                return
-            
-            round_data = room.current_round
             correct_emotion = round_data.emotion_id
+            state_store = self.state_store
             
             # Calculate scores based on game mode
             speaker = room.players[round_data.speaker_id]
@@ -729,31 +550,31 @@ class GameSocketEvents:
                     old_score = player.score
                     if voted_emotion == correct_emotion:
                         # Listener gets point for correct guess
-                        player.score += 1
+                        room.award_points(player, 1)
                         correct_votes += 1
-                        logger.info(f"Player {player.name} guessed correctly. Score: {old_score} -> {player.score}")
+                        logger.info("Player %s guessed correctly. Score: %s -> %s", player.name, old_score, player.score)
                     else:
-                        logger.info(f"Player {player.name} guessed wrong. Score remains: {player.score}")
+                        logger.info("Player %s guessed wrong. Score remains: %s", player.name, player.score)
             
             # Speaker gets points based on how many guessed correctly
             old_speaker_score = speaker.score
-            speaker.score += correct_votes
-            logger.info(f"Speaker {speaker.name} got {correct_votes} correct votes. Score: {old_speaker_score} -> {speaker.score}")
+            room.award_points(speaker, correct_votes)
+            logger.info("Speaker %s got %s correct votes. Score: %s -> %s", speaker.name, correct_votes, old_speaker_score, speaker.score)
             
             # Save individual scores to database
-            await self._save_round_scores(room, round_data, correct_votes)
+            await self._save_round_scores(state_store, room, round_data, correct_votes)
             
             # Check if game should end (reached max cycles) - BEFORE completing round
             # One cycle = all players speak once
             completed_rounds = len(room.round_history) + 1  # +1 for current round being completed
-            total_players = len([p for p in room.players.values() if p.is_connected])
+            total_players = room.connected_count
             completed_cycles = completed_rounds // total_players if total_players > 0 else 0
             is_game_complete = completed_cycles >= room.config.max_rounds
             
-            logger.info(f"🔄 Round completion check: completed_rounds={completed_rounds}, total_players={total_players}, "
-                       f"completed_cycles={completed_cycles}, max_rounds={room.config.max_rounds}, "
-                       f"is_game_complete={is_game_complete}, current_speaker_index={room.current_speaker_index}")
-            logger.info(f"🔄 Room config during completion check: {room.config.dict()}")
+            logger.info("🔄 Round completion check: completed_rounds=%d, total_players=%d, completed_cycles=%d, "
+                        "max_rounds=%d, is_game_complete=%s, current_speaker_index=%d",
+                        completed_rounds, total_players, completed_cycles, room.config.max_rounds,
+                        is_game_complete, room.current_speaker_index)
             
             # Mark round as completed
             round_data.is_completed = True
@@ -768,73 +589,37 @@ class GameSocketEvents:
             
             # Move to next speaker
             speaker_order = room.get_speaker_order()
-            logger.info(f"🔄 BEFORE index update: current_speaker_index={room.current_speaker_index}, speaker_order_length={len(speaker_order)}")
-            
             next_speaker_index = (room.current_speaker_index + 1) % len(speaker_order)
-            logger.info(f"🔄 CALCULATED next_speaker_index: {next_speaker_index}")
             
             # If we've wrapped around to 0, we're starting a new cycle
             if next_speaker_index == 0 and room.current_speaker_index != 0:
                 new_cycle_num = (len(room.round_history) // len(speaker_order)) + 1
-                logger.info(f"🔄 Starting new cycle #{new_cycle_num}, resetting speaker order")
+                logger.info("🔄 Starting new cycle #%d, resetting speaker order", new_cycle_num)
                 room.reset_speaker_order()
             
-            logger.info(f"🔄 SETTING room.current_speaker_index to {next_speaker_index}")
             room.current_speaker_index = next_speaker_index
-            logger.info(f"🔄 AFTER setting: room.current_speaker_index={room.current_speaker_index}")
             
             # Log next speaker info
-            updated_speaker_order = room.get_speaker_order()
             next_speaker = room.get_current_speaker()
-            logger.info(f"🎤 Round completed - Next speaker: index={room.current_speaker_index}, name={next_speaker.name if next_speaker else 'None'}")
-            logger.info(f"🎤 Updated speaker order: {updated_speaker_order}")
-            logger.info(f"🎤 Total rounds completed so far: {len(room.round_history)}")
+            if logger.isEnabledFor(INFO):
+                logger.info("🎤 Round completed - Next speaker: index=%d, name=%s", room.current_speaker_index, next_speaker.name if next_speaker else 'None')
+                logger.info("🎤 Updated speaker order: %s", room.get_speaker_order())
+                logger.info("🎤 Total rounds completed so far: %d", len(room.round_history))
             
-            state_store = get_state_store()
-            logger.info(f"🔄 BEFORE DB save: room.current_speaker_index={room.current_speaker_index}")
             await state_store.update_room(room)
-            logger.info(f"🔄 AFTER DB save: room.current_speaker_index={room.current_speaker_index}")
-            
-            # Verify by re-fetching from DB
-            saved_room = await state_store.get_room(room.id)
-            if saved_room:
-                logger.info(f"🔄 DB VERIFICATION: saved room current_speaker_index={saved_room.current_speaker_index}")
-            else:
-                logger.error(f"🔄 DB VERIFICATION: Could not retrieve room from DB")
             
             # Send results
-            # Log all players with their IDs and scores for debugging
-            logger.info(f"All players in room {room.id}:")
-            for pid, player in room.players.items():
-                logger.info(f"  - ID: {pid}, Name: {player.name}, Score: {player.score}")
-            
-            scores = {player.name: player.score for player in room.players.values()}
-            
-            # Log votes debugging info
-            logger.info(f"Round votes in room {room.id}:")
-            for pid, emotion in round_data.votes.items():
-                player = room.players.get(pid)
-                if player:
-                    logger.info(f"  - Player {player.name} (ID: {pid}) voted: {emotion}")
-                else:
-                    logger.info(f"  - Unknown player (ID: {pid}) voted: {emotion}")
-            
-            # Get emotion name for display
-            correct_emotion_name = correct_emotion  # fallback
-            
-            # For traditional modes
-            from models.emotion import BASIC_EMOTIONS, ADVANCED_EMOTIONS
-            
-            # Try to find emotion name
-            for emotion_info in BASIC_EMOTIONS.values():
-                if emotion_info.id == correct_emotion:
-                    correct_emotion_name = emotion_info.name_ja
-                    break
-            else:
-                for emotion_info in ADVANCED_EMOTIONS.values():
-                    if emotion_info.id == correct_emotion:
-                        correct_emotion_name = emotion_info.name_ja
-                        break
+            # Build scores and the ranking list in the same pass
+            players = room.players
+            scores = {}
+            players_data = []
+            for player in players.values():
+                scores[player.name] = player.score
+                players_data.append({'name': player.name, 'score': player.score})
+            
+            # Get emotion name for display (falls back to the id)
+            correct_emotion_name = EMOTION_ID_TO_NAME_JA.get(correct_emotion, correct_emotion)
+            names_by_id = room.player_names_by_id
             
             result_data = {
                 'round_id': round_data.id,
@@ -842,7 +627,7 @@ class GameSocketEvents:
                 'correctEmotionId': correct_emotion,  # Add emotion ID for easy comparison
                 'speaker_name': speaker.name,
                 'scores': scores,
-                'votes': {room.players[pid].name: emotion for pid, emotion in round_data.votes.items() if pid in room.players},
+                'votes': {names_by_id[pid]: emotion for pid, emotion in round_data.votes.items() if pid in names_by_id},
                 'isGameComplete': is_game_complete,
                 'completedRounds': completed_rounds,
                 'maxRounds': room.config.max_rounds,
@@ -850,31 +635,23 @@ class GameSocketEvents:
                 'maxCycles': room.config.max_rounds
             }
             
-            logger.info(f"🎉 Sending round_result event to room {room.id}")
-            logger.info(f"🎉 Result data: {result_data}")
-            logger.info(f"🎯 Game complete: {is_game_complete}, Phase set to: {room.phase}")
+            logger.info("🎉 Sending round_result event to room %s: %s", room.id, result_data)
             
-            await self.sio.emit('round_result', result_data, room=room.id)
+            # The follow-up emits are independent of each other, so send them together
+            emits = [self._emit('round_result', result_data, room=room.id)]
             
             # Send updated room state if game continues (so frontend knows next speaker)
             if not is_game_complete:
                 next_speaker = room.get_current_speaker()
                 # Include player scores in the room state
-                players_data = [{'name': p.name, 'score': p.score} for p in room.players.values()]
-                await self.sio.emit('room_state', {
-                    'roomId': room.id,
-                    'players': players_data,
-                    'phase': room.phase,
-                    'config': room.config.model_dump(),
-                    'currentSpeaker': next_speaker.name if next_speaker else None
-                }, room=room.id)
-                logger.info(f"⏭️ Round completed, ready for next round in room {room.id}. Next speaker: {next_speaker.name if next_speaker else 'None'}")
+                emits.append(self._emit('room_state', make_room_state(room, next_speaker.name if next_speaker else None), room=room.id))
+                logger.info("⏭️ Round completed, ready for next round in room %s. Next speaker: %s", room.id, next_speaker.name if next_speaker else 'None')
             else:
-                logger.info(f"🏆 Game completed in room {room.id}!")
+                logger.info("🏆 Game completed in room %s!", room.id)
                 
                 # Send game_complete event with final rankings
                 final_rankings = sorted(
-                    [{'name': player.name, 'score': player.score} for player in room.players.values()],
+                    players_data,
                     key=lambda x: x['score'],
                     reverse=True
                 )
@@ -883,126 +660,88 @@ class GameSocketEvents:
                 for i, player_data in enumerate(final_rankings):
                     player_data['rank'] = i + 1
                 
-                logger.info(f"🏆 Sending game_complete event with rankings: {final_rankings}")
+                logger.info("🏆 Sending game_complete event with rankings: %s", final_rankings)
                 
-                await self.sio.emit('game_complete', {
+                emits.append(self._emit('game_complete', {
                     'rankings': final_rankings,
                     'totalRounds': completed_rounds,
                     'totalCycles': completed_cycles
-                }, room=room.id)
+                }, room=room.id))
+            
+            await asyncio.gather(*emits)
             
-            logger.info(f"Round completed in room {room.id}: {correct_emotion_name}")
+            logger.info("Round completed in room %s: %s", room.id, correct_emotion_name)
             
         except Exception as e:
-            logger.error(f"Error completing round: {e}", exc_info=True)
+            # Release the claim so the next vote or timeout can retry the round
+            self._completed_rounds.pop(round_data.id, None)
+            logger.error("Error completing round: %s", e, exc_info=True)
     
-    async def _save_round_scores(self, room, round_data, correct_votes):
+    async def _save_round_scores(self, state_store, room, round_data, correct_votes):
         """Save individual round scores to database"""
         try:
-            # Save listener scores
-            for player_id, voted_emotion in round_data.votes.items():
-                if voted_emotion == round_data.emotion_id:  # Correct vote
-                    await self._save_score(room.id, round_data.id, player_id, 1, 'listener')
-                else:  # Incorrect vote
-                    await self._save_score(room.id, round_data.id, player_id, 0, 'listener')
+            # Listener scores (1 for a correct vote, 0 otherwise), then the speaker score
+            entries = [
+                (player_id, 1 if voted_emotion == round_data.emotion_id else 0, 'listener')
+                for player_id, voted_emotion in round_data.votes.items()
+            ]
+            entries.append((round_data.speaker_id, correct_votes, 'speaker'))
             
-            # Save speaker score
-            await self._save_score(room.id, round_data.id, round_data.speaker_id, correct_votes, 'speaker')
+            # Written in one batch rather than one transaction per player
+            await state_store.save_scores(room.id, round_data.id, entries)
             
-            logger.info(f"Saved scores for round {round_data.id}: {len(round_data.votes)} listeners, 1 speaker")
+            logger.info("Saved scores for round %s: %s listeners, 1 speaker", round_data.id, len(round_data.votes))
             
         except Exception as e:
-            logger.error(f"Error saving round scores: {e}", exc_info=True)
+            logger.error("Error saving round scores: %s", e, exc_info=True)
     
-    async def _save_score(self, room_id, round_id, player_id, points, score_type):
-        """Save a single score entry to database"""
-        try:
-            state_store = get_state_store()
-            if hasattr(state_store, 'save_score'):
-                await state_store.save_score(room_id, round_id, player_id, points, score_type)
-        except Exception as e:
-            logger.error(f"Error saving score for player {player_id}: {e}", exc_info=True)
-    
-    async def _handle_player_disconnect(self, sid):
-        """Handle player disconnection"""
-        try:
-            session = await self.sio.get_session(sid)
-            room_id = session.get('room_id')
-            player_id = session.get('player_id')
-            
-            if room_id and player_id:
-                state_store = get_state_store()
-                room = await state_store.get_room(room_id)
-                if room and player_id in room.players:
-                    player = room.players[player_id]
-                    player.is_connected = False
-                    state_store = get_state_store()
-                    await state_store.update_room(room)
-                    
-                    await self.sio.emit('player_disconnected', {
-                        'playerName': player.name,
-                        'playerId': player_id
-                    }, room=room_id)
-        except Exception as e:
-            logger.error(f"Error handling disconnect: {e}")
-    
-    async def _check_vote_timeout(self, room_id: str, round_id: str):
+    async def _check_vote_timeout(self, room_id: str, round_id: str, timeout_seconds: int):
         """Check if voting has timed out and force complete the round"""
         try:
-            from datetime import datetime, timezone
-            import asyncio
-            
-            # Get the timeout duration from room config
-            room = await get_state_store().get_room(room_id)
-            if not room:
-                logger.warning(f"⏰ Timeout check: Room {room_id} not found")
-                return
-            timeout_seconds = room.config.vote_timeout
-            logger.info(f"⏰ Starting timeout check for room {room_id}, round {round_id}, timeout: {timeout_seconds}s")
-            
             # Wait for the timeout duration
-            logger.info(f"⏰ Waiting {timeout_seconds} seconds for timeout...")
             await asyncio.sleep(timeout_seconds)
-            logger.info(f"⏰ Timeout period elapsed for room {room_id}")
+            logger.info("⏰ Timeout period elapsed for room %s, round %s", room_id, round_id)
             
             # Get current room state
-            state_store = get_state_store()
-            room = await state_store.get_room(room_id)
-            
-            if not room or not room.current_round:
-                logger.info(f"⏰ Vote timeout check: Round already completed in room {room_id}")
-                return
-                
-            # Check if this is still the same round
-            if room.current_round.id != round_id:
-                logger.info(f"⏰ Vote timeout check: Different round active in room {room_id} (expected: {round_id}, current: {room.current_round.id})")
-                return
-                
-            # Check if voting has already completed
-            if room.current_round.is_completed:
-                logger.info(f"⏰ Vote timeout check: Round already completed in room {room_id}")
-                return
-                
-            # Check actual timeout based on voting_started_at
-            if room.current_round.voting_started_at:
-                # Ensure voting_started_at has timezone info
-                voting_start_time = room.current_round.voting_started_at
-                if voting_start_time.tzinfo is None:
-                    # If offset-naive, assume it's UTC
-                    voting_start_time = voting_start_time.replace(tzinfo=timezone.utc)
-                
-                elapsed = datetime.now(timezone.utc) - voting_start_time
-                timeout_seconds = room.current_round.vote_timeout_seconds
+            state_store = self.state_store
+            # Serialized with votes, restarts and disconnects of the room
+            async with self._lock_for(room_id):
+                room = await state_store.get_room(room_id)
                 
-                if elapsed.total_seconds() >= timeout_seconds:
-                    logger.warning(f"⏰ Vote timeout in room {room_id}! Forcing round completion after {elapsed.total_seconds():.1f}s")
+                if not room or not room.current_round:
+                    logger.info("⏰ Vote timeout check: Round already completed in room %s", room_id)
+                    return
                     
-                    # Force complete the round silently (no timeout notification)
-                    await self._complete_round(room)
+                # Check if this is still the same round
+                if room.current_round.id != round_id:
+                    logger.info("⏰ Vote timeout check: Different round active in room %s (expected: %s, current: %s)", room_id, round_id, room.current_round.id)
+                    return
+                    
+                # Check if voting has already completed
+                if room.current_round.is_completed:
+                    logger.info("⏰ Vote timeout check: Round already completed in room %s", room_id)
+                    return
+                    
+                # Check actual timeout based on voting_started_at
+                if room.current_round.voting_started_at:
+                    # Ensure voting_started_at has timezone info
+                    voting_start_time = room.current_round.voting_started_at
+                    if voting_start_time.tzinfo is None:
+                        # If offset-naive, assume it's UTC
+                        voting_start_time = voting_start_time.replace(tzinfo=timezone.utc)
+                    
+                    elapsed = datetime.now(timezone.utc) - voting_start_time
+                    timeout_seconds = room.current_round.vote_timeout_seconds
+                    
+                    if elapsed.total_seconds() >= timeout_seconds:
+                        logger.warning("⏰ Vote timeout in room %s! Forcing round completion after %.1fs", room_id, elapsed.total_seconds())
+                        
+                        # Force complete the round silently (no timeout notification)
+                        await self._complete_round(room)
+                    else:
+                        logger.info("⏰ Vote timeout check: Still within time limit in room %s", room_id)
                 else:
-                    logger.info(f"⏰ Vote timeout check: Still within time limit in room {room_id}")
-            else:
-                logger.warning(f"⏰ Vote timeout check: No voting_started_at time in room {room_id}")
+                    logger.warning("⏰ Vote timeout check: No voting_started_at time in room %s", room_id)
                 
         except Exception as e:
-            logger.error(f"Error in vote timeout check for room {room_id}: {e}", exc_info=True)
\ No newline at end of file
+            logger.error("Error in vote timeout check for room %s: %s", room_id, e, exc_info=True)
\ No newline at end of file
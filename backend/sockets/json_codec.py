@@ -0,0 +1,46 @@
+"""JSON module handed to the Socket.IO server for packet encoding"""
+import json
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+else:
+    # Bound once so each packet skips the module attribute lookups
+    _orjson_dumps = orjson.dumps
+    _orjson_loads = orjson.loads
+    _OrjsonEncodeError = orjson.JSONEncodeError
+    _OPT_NON_STR_KEYS = orjson.OPT_NON_STR_KEYS
+
+class OrjsonCodec:
+    """json-module compatible wrapper around orjson
+
+    Socket.IO passes stdlib options such as ``separators``; orjson always
+    emits compact output, so those are ignored. A ``default`` hook is
+    forwarded so callers that rely on it keep working.
+    
+    Payload keys are strings, so packets are encoded without
+    OPT_NON_STR_KEYS (which makes orjson check every key); the option is
+    only used to retry a payload orjson rejects.
+    """
+    
+    @staticmethod
+    def dumps(obj, *args, default=None, **kwargs) -> str:
+        try:
+            return _orjson_dumps(obj, default=default).decode()
+        except _OrjsonEncodeError:
+            return _orjson_dumps(obj, default=default, option=_OPT_NON_STR_KEYS).decode()
+    
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return _orjson_loads(s)
+
+def get_json_module():
+    """Get the fastest available JSON module for Socket.IO"""
+    if orjson is None:
+        logger.info("orjson not installed, Socket.IO uses the standard json module")
+        return json
+    return OrjsonCodec
@@ -0,0 +1,60 @@
+"""Socket.IO payload builders and room names shared by the event handlers"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+def player_room(player_id: str) -> str:
+    """Socket.IO room joined by every sid of a player (per-user channel)"""
+    return f"player:{player_id}"
+
+def make_error(code: str, message: str) -> Dict[str, str]:
+    """Build an error payload"""
+    return {'code': code, 'message': message}
+
+# Fixed error payloads, built once at import. Treat as read-only.
+ERR_MISSING_JOIN_DATA = make_error('EMO-400', 'Missing roomId or playerName')
+ERR_NOT_AUTHENTICATED = make_error('EMO-401', 'Not authenticated')
+ERR_ROOM_NOT_FOUND = make_error('EMO-404', 'Room not found')
+ERR_ROOM_OR_PLAYER_NOT_FOUND = make_error('EMO-404', 'Room or player not found')
+ERR_NO_ACTIVE_ROUND = make_error('EMO-404', 'No active round')
+ERR_HOST_ONLY_START = make_error('EMO-403', 'Only host can start rounds')
+ERR_HOST_ONLY_RESTART = make_error('EMO-403', 'Only host can restart the game')
+ERR_NOT_ENOUGH_PLAYERS = make_error('EMO-400', 'Need at least 2 players to start the game')
+ERR_NO_PLAYERS = make_error('EMO-400', 'No players available')
+ERR_INVALID_ROUND = make_error('EMO-400', 'Invalid round ID')
+ERR_SPEAKER_CANNOT_VOTE = make_error('EMO-400', 'Speaker cannot vote')
+ERR_JOINED_AFTER_ROUND_START = make_error('EMO-403', 'You joined after the round started and cannot vote')
+ERR_SPEAKER_ONLY_AUDIO = make_error('EMO-403', 'Only the speaker can send audio')
+ERR_NO_AUDIO = make_error('EMO-400', 'No audio data provided')
+# Exception details stay in the server log
+ERR_INTERNAL = make_error('EMO-500', 'Internal server error')
+
+@lru_cache(maxsize=None)
+def err_not_waiting(phase) -> Dict[str, str]:
+    """Error payload for starting a round outside the waiting phase (one shared dict per phase)"""
+    return make_error('EMO-409', f'Room is not in waiting phase (current: {phase})')
+
+def make_player_change(change_type: str, player_name: str, player_id: str) -> Dict[str, str]:
+    """Build the membership change carried by room_state ('joined' or 'reconnected')"""
+    return {'type': change_type, 'playerName': player_name, 'playerId': player_id}
+
+def make_room_state(room, current_speaker: Optional[str], change: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Build the room_state payload (player scores are included)"""
+    payload = {
+        'roomId': room.id,
+        'players': room.score_board(),
+        'phase': room.phase,
+        'config': room.config_as_dict(),
+        'currentSpeaker': current_speaker
+    }
+    if change is not None:
+        payload['change'] = change
+    return payload
+
+def make_round_start(round_id: str, phrase: str, speaker_name: str, choice_data: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Build the round_start payload"""
+    return {
+        'roundId': round_id,
+        'phrase': phrase,
+        'speakerName': speaker_name,
+        'votingChoices': choice_data
+    }
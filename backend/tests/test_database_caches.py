@@ -0,0 +1,46 @@
+"""In-memory caches of DatabaseStateStore"""
+from models.game import Room
+from services.database_state_store import DatabaseStateStore
+
+
+def make_store(process_local: bool = True) -> DatabaseStateStore:
+    # The caches are filled and read without touching the database
+    return DatabaseStateStore(db_service=None, process_local=process_local)
+
+
+def test_room_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(DatabaseStateStore, 'ROOM_CACHE_MAX', 3)
+    store = make_store()
+    rooms = [Room(id=f'room{i}') for i in range(5)]
+    for room in rooms:
+        store._cache_room(room)
+    assert list(store._room_cache) == ['room2', 'room3', 'room4']
+
+
+def test_expired_rooms_are_swept_on_insert():
+    store = make_store()
+    old = Room(id='old')
+    store._cache_room(old)
+    store._room_cache['old'] = (0.0, old)  # expired long ago
+    store._cache_room(Room(id='new'))
+    assert list(store._room_cache) == ['new']
+
+
+def test_rooms_are_not_cached_without_local_fanout():
+    store = make_store(process_local=False)
+    store._cache_room(Room(id='room1'))
+    assert not store._room_cache
+
+
+def test_missing_rooms_are_bounded(monkeypatch):
+    monkeypatch.setattr(DatabaseStateStore, 'MISSING_ROOMS_MAX', 2)
+    store = make_store()
+    for room_id in ('a', 'b', 'c'):
+        store._remember_missing(room_id)
+    assert list(store._missing_rooms) == ['b', 'c']
+
+
+def test_missing_rooms_are_not_remembered_without_local_fanout():
+    store = make_store(process_local=False)
+    store._remember_missing('a')
+    assert not store._missing_rooms
@@ -0,0 +1,128 @@
+"""Deferred room writes (mark_dirty) in DatabaseStateStore"""
+import asyncio
+
+from models.game import Player, Room, Round
+from services.database_state_store import DatabaseStateStore
+
+
+class NoDatabase(Exception):
+    pass
+
+
+class NoDatabaseService:
+    """Fails every session request, so only the store's in-memory bookkeeping runs"""
+
+    def get_session(self):
+        raise NoDatabase()
+
+
+class RecordingStore(DatabaseStateStore):
+    """Records each write, then runs the real method until it reaches the database"""
+    FLUSH_INTERVAL = 0.01
+
+    def __init__(self):
+        super().__init__(NoDatabaseService())
+        self.writes = []
+
+    async def update_room(self, room: Room) -> None:
+        self.writes.append(('full', room.id))
+        try:
+            await super().update_room(room)
+        except NoDatabase:
+            pass
+
+    async def update_round_votes(self, room: Room) -> None:
+        self.writes.append(('votes', room.id))
+        try:
+            await super().update_round_votes(room)
+        except NoDatabase:
+            pass
+
+
+def make_room() -> Room:
+    room = Room()
+    speaker = Player(name='speaker')
+    room.add_player(speaker)
+    room.current_round = Round(phrase='はぁ…', emotion_id='joy', speaker_id=speaker.id)
+    return room
+
+
+async def flushed(store: RecordingStore) -> None:
+    await asyncio.sleep(store.FLUSH_INTERVAL * 5)
+
+
+def test_dirty_room_is_served_before_flush():
+    async def run():
+        store = RecordingStore()
+        room = make_room()
+        store.mark_dirty(room)
+        assert await store.get_room(room.id) is room
+        assert store.writes == []
+        await flushed(store)
+    asyncio.run(run())
+
+
+def test_repeated_marks_are_written_once():
+    async def run():
+        store = RecordingStore()
+        room = make_room()
+        store.mark_dirty(room)
+        store.mark_dirty(room, votes_only=True)
+        store.mark_dirty(room)
+        await flushed(store)
+        assert store.writes == [('full', room.id)]
+        assert store._dirty_rooms == {}
+        assert store._dirty_full == set()
+        await flushed(store)
+        assert store.writes == [('full', room.id)]
+    asyncio.run(run())
+
+
+def test_votes_only_mark_flushes_votes():
+    async def run():
+        store = RecordingStore()
+        room = make_room()
+        store.mark_dirty(room, votes_only=True)
+        store.mark_dirty(room, votes_only=True)
+        await flushed(store)
+        assert store.writes == [('votes', room.id)]
+    asyncio.run(run())
+
+
+def test_full_update_overrides_pending_votes_flush():
+    async def run():
+        store = RecordingStore()
+        room = make_room()
+        store.mark_dirty(room, votes_only=True)
+        await store.update_room(room)
+        await flushed(store)
+        assert store.writes == [('full', room.id)]
+    asyncio.run(run())
+
+
+def test_room_is_served_while_its_flush_is_written():
+    async def run():
+        store = RecordingStore()
+        room = make_room()
+        writing = asyncio.Event()
+        release = asyncio.Event()
+        votes_write = store.update_round_votes
+
+        async def slow_votes_write(room):
+            writing.set()
+            await release.wait()
+            await votes_write(room)
+        store.update_round_votes = slow_votes_write
+
+        store.mark_dirty(room, votes_only=True)
+        await writing.wait()
+        assert await store.get_room(room.id) is room
+
+        # A vote recorded during the write is flushed again afterwards
+        room.current_round.votes['late'] = 'joy'
+        store.mark_dirty(room, votes_only=True)
+        release.set()
+        await flushed(store)
+        assert store.writes == [('votes', room.id), ('votes', room.id)]
+        assert store._flushing_rooms == {}
+    asyncio.run(run())
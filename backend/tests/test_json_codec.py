@@ -0,0 +1,49 @@
+"""Socket.IO JSON codec"""
+import json
+from datetime import datetime
+
+import pytest
+
+from sockets import json_codec
+from sockets.json_codec import OrjsonCodec, get_json_module
+
+
+def test_round_trip_matches_json():
+    payload = {'roomId': 'abc', 'players': ['はぁ…', 'b'], 'scores': {'a': 1}, 'ok': True, 'none': None}
+    encoded = OrjsonCodec.dumps(payload, separators=(',', ':'))
+    assert isinstance(encoded, str)
+    assert OrjsonCodec.loads(encoded) == payload
+    assert json.loads(encoded) == payload
+
+
+def test_non_string_keys_are_retried():
+    payload = {1: 'one', 'two': 2}
+    encoded = OrjsonCodec.dumps(payload)
+    assert OrjsonCodec.loads(encoded) == {'1': 'one', 'two': 2}
+
+
+def test_default_is_forwarded():
+    class Tag:
+        pass
+
+    encoded = OrjsonCodec.dumps({'tag': Tag(), 3: 'x'}, default=lambda obj: 'tag')
+    assert OrjsonCodec.loads(encoded) == {'tag': 'tag', '3': 'x'}
+
+
+def test_unserializable_without_default_raises():
+    with pytest.raises(TypeError):
+        OrjsonCodec.dumps({'value': object()})
+
+
+def test_datetime_matches_isoformat():
+    moment = datetime(2024, 1, 2, 3, 4, 5)
+    assert OrjsonCodec.loads(OrjsonCodec.dumps({'at': moment})) == {'at': moment.isoformat()}
+
+
+def test_uses_orjson_when_installed():
+    assert get_json_module() is OrjsonCodec
+
+
+def test_falls_back_to_json_without_orjson(monkeypatch):
+    monkeypatch.setattr(json_codec, 'orjson', None)
+    assert get_json_module() is json
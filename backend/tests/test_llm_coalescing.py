@@ -0,0 +1,95 @@
+"""Concurrent phrase requests share one OpenAI call"""
+import asyncio
+from types import SimpleNamespace
+
+from services.llm_service import LLMService
+
+
+class StubCompletions:
+    """Stands in for client.chat.completions; each call waits for release()"""
+
+    def __init__(self, content='なるほどね', error=None):
+        self.calls = 0
+        self.content = content
+        self.error = error
+        self.released = asyncio.Event()
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await self.released.wait()
+        if self.error is not None:
+            raise self.error
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_service(completions: StubCompletions) -> LLMService:
+    service = LLMService()
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return service
+
+
+def test_concurrent_callers_share_one_request():
+    async def run():
+        completions = StubCompletions()
+        service = make_service(completions)
+        tasks = [asyncio.create_task(service._generate_phrase_coalesced('basic')) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert completions.calls == 1
+        assert 'basic' in service._inflight
+        completions.released.set()
+        assert await asyncio.gather(*tasks) == ['なるほどね'] * 3
+        assert service._inflight == {}
+    asyncio.run(run())
+
+
+def test_failed_request_clears_inflight():
+    async def run():
+        completions = StubCompletions(error=RuntimeError('API down'))
+        service = make_service(completions)
+        tasks = [asyncio.create_task(service._generate_phrase_coalesced('basic')) for _ in range(2)]
+        await asyncio.sleep(0)
+        completions.released.set()
+        phrases = await asyncio.gather(*tasks)
+        assert completions.calls == 1
+        assert all(phrase in service.fallback_phrases for phrase in phrases)
+        assert service._inflight == {}
+    asyncio.run(run())
+
+
+def test_failure_raised_to_coalesced_callers_clears_inflight():
+    async def run():
+        service = LLMService()
+        release = asyncio.Event()
+
+        async def failing_generate():
+            await release.wait()
+            raise RuntimeError('boom')
+        service._generate_phrase_with_openai = failing_generate
+
+        tasks = [asyncio.create_task(service._generate_phrase_coalesced('basic')) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert service._inflight == {}
+    asyncio.run(run())
+
+
+def test_cancelled_request_clears_inflight():
+    async def run():
+        completions = StubCompletions()
+        service = make_service(completions)
+        owner = asyncio.create_task(service._generate_phrase_coalesced('basic'))
+        waiter = asyncio.create_task(service._generate_phrase_coalesced('basic'))
+        await asyncio.sleep(0)
+        owner.cancel()
+        results = await asyncio.gather(owner, waiter, return_exceptions=True)
+        assert all(isinstance(result, asyncio.CancelledError) for result in results)
+        assert service._inflight == {}
+
+        # The next caller starts a fresh request
+        completions.released.set()
+        assert await service._generate_phrase_coalesced('basic') == 'なるほどね'
+        assert completions.calls == 2
+    asyncio.run(run())
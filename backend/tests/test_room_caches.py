@@ -0,0 +1,97 @@
+"""Room keeps several derived views cached; each must match a fresh computation"""
+from models.game import Player, Room
+
+
+def warm(room: Room) -> None:
+    """Build every cache so the mutators take their incremental paths"""
+    room.player_names
+    room.player_names_by_id
+    room.connected_player_ids
+    room.score_board()
+    for player in list(room.players.values()):
+        room.find_player_by_name(player.name)
+
+
+def assert_fresh(room: Room) -> None:
+    players = list(room.players.values())
+    assert room.player_names == [p.name for p in players]
+    assert room.player_names_by_id == {p.id: p.name for p in players}
+    assert room.connected_player_ids == {p.id for p in players if p.is_connected}
+    assert room.connected_count == sum(1 for p in players if p.is_connected)
+    assert room.score_board() == [{'name': p.name, 'score': p.score} for p in players]
+    first_by_name = {}
+    for p in players:
+        first_by_name.setdefault(p.name, p)
+    for name, player in first_by_name.items():
+        assert room.find_player_by_name(name) is player
+    assert room.find_player_by_name('nobody') is None
+
+
+def make_room(*names: str) -> Room:
+    room = Room()
+    for name in names:
+        room.add_player(Player(name=name))
+    return room
+
+
+def test_add_player_extends_caches():
+    room = make_room('a', 'b')
+    warm(room)
+    room.add_player(Player(name='c'))
+    room.add_player(Player(name='a', is_connected=False))
+    assert_fresh(room)
+
+
+def test_add_player_replacing_existing_id():
+    room = make_room('a', 'b')
+    warm(room)
+    old = room.find_player_by_name('a')
+    room.add_player(Player(id=old.id, name='z', score=3))
+    assert_fresh(room)
+
+
+def test_rename_player():
+    room = make_room('a', 'b', 'c')
+    warm(room)
+    room.rename_player(room.find_player_by_name('a'), 'd')
+    assert_fresh(room)
+    # Renaming onto a taken name keeps the earliest-joined player first
+    room.rename_player(room.find_player_by_name('c'), 'b')
+    assert_fresh(room)
+
+
+def test_disconnect_and_reconnect():
+    room = make_room('a', 'b')
+    warm(room)
+    player = room.find_player_by_name('a')
+    assert room.set_player_connected(player, False)
+    assert_fresh(room)
+    assert not room.set_player_connected(player, False)
+    assert room.set_player_connected(player, True)
+    assert_fresh(room)
+
+
+def test_award_points_and_reset_scores():
+    room = make_room('a', 'b')
+    warm(room)
+    room.award_points(room.find_player_by_name('b'), 2)
+    assert_fresh(room)
+    room.reset_scores()
+    assert_fresh(room)
+
+
+def test_players_reassignment_invalidates_caches():
+    room = make_room('a', 'b')
+    warm(room)
+    replacement = Player(name='x', is_connected=False)
+    room.players = {replacement.id: replacement}
+    assert_fresh(room)
+
+
+def test_cached_lists_are_replaced_not_mutated():
+    room = make_room('a')
+    names = room.player_names
+    board = room.score_board()
+    room.add_player(Player(name='b'))
+    assert names == ['a']
+    assert board == [{'name': 'a', 'score': 0}]
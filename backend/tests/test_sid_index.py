@@ -0,0 +1,62 @@
+"""Socket sid bindings kept by the state store"""
+from services.state_store import MemoryStateStore
+
+
+def test_bind_and_lookup():
+    store = MemoryStateStore()
+    store.bind_sid('p1', 'sid1', 'room1')
+    assert store.lookup_sid('sid1') == ('room1', 'p1')
+    assert store.room_sids('room1') == {'sid1'}
+    assert store.player_sids['p1'] == {'sid1'}
+    assert store.lookup_sid('unknown') == (None, None)
+    assert store.room_sids('unknown') == set()
+
+
+def test_rebind_sid_to_another_room():
+    store = MemoryStateStore()
+    store.bind_sid('p1', 'sid1', 'room1')
+    store.bind_sid('p1', 'sid1', 'room2')
+    assert store.lookup_sid('sid1') == ('room2', 'p1')
+    assert store.room_sids('room1') == set()
+    assert 'room1' not in store._room_sids
+    assert store.room_sids('room2') == {'sid1'}
+    assert store.player_sids['p1'] == {'sid1'}
+
+
+def test_rebind_sid_to_another_player():
+    store = MemoryStateStore()
+    store.bind_sid('p1', 'sid1', 'room1')
+    store.bind_sid('p2', 'sid1', 'room1')
+    assert store.lookup_sid('sid1') == ('room1', 'p2')
+    assert 'p1' not in store.player_sids
+    assert store.player_sids['p2'] == {'sid1'}
+    assert store.room_sids('room1') == {'sid1'}
+
+
+def test_unbind_last_sid_of_room():
+    store = MemoryStateStore()
+    store.bind_sid('p1', 'sid1', 'room1')
+    assert store.unbind_sid('sid1') == 'p1'
+    assert store.lookup_sid('sid1') == (None, None)
+    assert store.room_sids('room1') == set()
+    assert 'room1' not in store._room_sids
+    assert 'p1' not in store.player_sids
+    assert store.unbind_sid('sid1') is None
+
+
+def test_multiple_sids_for_one_player():
+    store = MemoryStateStore()
+    store.bind_sid('p1', 'sid1', 'room1')
+    store.bind_sid('p1', 'sid2', 'room1')
+    store.bind_sid('p2', 'sid3', 'room1')
+    assert store.player_sids['p1'] == {'sid1', 'sid2'}
+    assert store.room_sids('room1') == {'sid1', 'sid2', 'sid3'}
+
+    assert store.unbind_sid('sid1') == 'p1'
+    assert store.player_sids['p1'] == {'sid2'}
+    assert store.room_sids('room1') == {'sid2', 'sid3'}
+    assert store.lookup_sid('sid2') == ('room1', 'p1')
+
+    assert store.unbind_sid('sid2') == 'p1'
+    assert 'p1' not in store.player_sids
+    assert store.room_sids('room1') == {'sid3'}
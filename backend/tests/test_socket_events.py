@@ -0,0 +1,161 @@
+"""Game event handlers run against a MemoryStateStore and a recording Socket.IO server"""
+import asyncio
+
+import pytest
+import socketio
+
+from models.game import GamePhase, Player, Room, RoomConfig, Round
+from services.state_store import MemoryStateStore
+from services.voice_processing_service import voice_processing_service
+from sockets.events_minimal import GameSocketEvents
+
+
+class RecordingServer(socketio.AsyncServer):
+    """Records every emitted event name (no clients are connected)"""
+
+    def __init__(self):
+        super().__init__(async_mode='asgi')
+        self.emitted = []
+
+    async def emit(self, event, data=None, *args, **kwargs):
+        self.emitted.append(event)
+        return await super().emit(event, data, *args, **kwargs)
+
+
+class Events(GameSocketEvents):
+    def __init__(self, sio, store):
+        self._store = store
+        super().__init__(sio)
+
+    def _get_state_store(self):
+        return self._store
+
+
+def handler(events: Events, name: str):
+    return events.sio.handlers['/'][name]
+
+
+@pytest.fixture
+def game():
+    """A hard-mode room with host speaker h and listener l, mid-round"""
+    store = MemoryStateStore()
+    sio = RecordingServer()
+    events = Events(sio, store)
+    room = Room(id='room1', config=RoomConfig(hard_mode=True))
+    host = Player(id='h', name='host', is_host=True)
+    listener = Player(id='l', name='listener')
+    room.add_player(host)
+    room.add_player(listener)
+    room.current_round = Round(phrase='はぁ…', emotion_id='joy', speaker_id='h',
+                               eligible_voters=['l'], expected_votes=1)
+    room.phase = GamePhase.IN_ROUND
+    asyncio.run(store.create_room(room))
+    store.bind_sid('h', 'sid-h', 'room1')
+    store.bind_sid('l', 'sid-l', 'room1')
+    events._host_sids.add('sid-h')
+    return events, store, sio
+
+
+def test_audio_send_drops_audio_when_restarted_during_processing(game, monkeypatch):
+    events, store, sio = game
+
+    async def run():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_processing(audio_data, config):
+            started.set()
+            await release.wait()
+            return b'processed'
+        monkeypatch.setattr(voice_processing_service, 'is_enabled', lambda: True)
+        monkeypatch.setattr(voice_processing_service, 'process_audio_async', slow_processing)
+
+        audio = asyncio.create_task(handler(events, 'audio_send')('sid-h', {'audio': b'raw'}))
+        await started.wait()
+        await handler(events, 'restart_game')('sid-h', {})
+        release.set()
+        await audio
+
+        room = await store.get_room('room1')
+        assert room.phase == GamePhase.WAITING
+        assert room.current_round is None
+        assert 'audio_received' not in sio.emitted
+    asyncio.run(run())
+
+
+def test_audio_send_starts_voting(game):
+    events, store, sio = game
+
+    async def run():
+        await handler(events, 'audio_send')('sid-h', {'audio': b'raw'})
+        room = await store.get_room('room1')
+        assert room.current_round.voting_started_at is not None
+        assert room.current_round.audio_recording_id is not None
+        assert sio.emitted == ['audio_received']
+    asyncio.run(run())
+
+
+def test_failed_completion_can_be_retried(game, monkeypatch):
+    events, store, sio = game
+
+    async def run():
+        room = await store.get_room('room1')
+        round_id = room.current_round.id
+        room.current_round.votes['l'] = 'joy'
+
+        async def failing_update(room):
+            raise RuntimeError('database down')
+        with monkeypatch.context() as patch:
+            patch.setattr(store, 'update_room', failing_update)
+            await events._complete_round(room.model_copy(deep=True))
+        assert round_id not in events._completed_rounds
+
+        await events._complete_round(room)
+        assert room.current_round is None
+        assert room.phase == GamePhase.WAITING
+        assert 'round_result' in sio.emitted
+    asyncio.run(run())
+
+
+def test_join_room_enters_socket_rooms_and_binds_sid():
+    store = MemoryStateStore()
+    sio = RecordingServer()
+    events = Events(sio, store)
+
+    async def run():
+        await store.create_room(Room(id='room2'))
+        sid = sio.manager.connect('eio-1', '/')
+        await handler(events, 'join_room')(sid, {'roomId': 'room2', 'playerName': 'alice', 'playerId': 'a'})
+        assert store.lookup_sid(sid) == ('room2', 'a')
+        assert sid in events._host_sids
+        assert set(sio.rooms(sid)) >= {'room2', 'player:a'}
+        assert sio.emitted == ['room_state']
+    asyncio.run(run())
+
+
+def test_restart_resets_scores(game):
+    events, store, sio = game
+
+    async def run():
+        room = await store.get_room('room1')
+        room.award_points(room.players['l'], 2)
+        await handler(events, 'restart_game')('sid-h', {})
+        restarted = await store.get_room('room1')
+        assert restarted is not room
+        assert restarted.phase == GamePhase.WAITING
+        assert [p.score for p in restarted.players.values()] == [0, 0]
+        assert restarted.score_board() == [{'name': 'host', 'score': 0}, {'name': 'listener', 'score': 0}]
+        assert sio.emitted == ['room_state']
+    asyncio.run(run())
+
+
+def test_handler_error_is_reported_before_returning(game, monkeypatch):
+    events, store, sio = game
+
+    async def run():
+        async def broken_get_room(room_id):
+            raise RuntimeError('store down')
+        monkeypatch.setattr(store, 'get_room', broken_get_room)
+        await handler(events, 'submit_vote')('sid-l', {'roundId': 'r', 'emotionId': 'joy'})
+        assert sio.emitted == ['error']
+    asyncio.run(run())
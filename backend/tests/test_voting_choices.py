@@ -0,0 +1,15 @@
+"""round_start voting choices"""
+from models.emotion import get_voting_choice_data
+
+
+def test_choice_counts_include_the_correct_emotion():
+    for vote_type, count in (('4choice', 4), ('8choice', 8)):
+        choices = get_voting_choice_data('advanced', 'joy', vote_type)
+        assert len(choices) == count
+        assert {'id': 'joy', 'name': '喜び'} in choices
+        assert len({choice['id'] for choice in choices}) == count
+
+
+def test_wheel_has_no_choices():
+    assert get_voting_choice_data('wheel', 'joy', 'wheel') == []
+    assert get_voting_choice_data('basic', 'joy', 'wheel') == []
@@ -52,6 +52,9 @@ export const useSocket = () => {
 
     // Room events
     socket.on('room_state', (data: RoomState) => {
+      if (data.change) {
+        console.log(`${data.change.playerName} ${data.change.type} the room`);
+      }
       store.setRoomState(data);
       
       // Only clear game complete state when returning to waiting phase
@@ -88,6 +91,10 @@ export const useSocket = () => {
       console.log(`${data.playerName} disconnected`);
     });
 
+    socket.on('players_disconnected', (data) => {
+      console.log(`${data.players.map((p) => p.playerName).join(', ')} disconnected`);
+    });
+
     // Round events
     socket.on('round_start', (data) => {
       console.log('🎮 round_start event received:', data);
@@ -270,6 +277,7 @@ export const useSocket = () => {
       socket.off('player_left');
       socket.off('left_room');
       socket.off('player_disconnected');
+      socket.off('players_disconnected');
       socket.off('round_start');
       socket.off('speaker_emotion');
       socket.off('round_result');
@@ -41,12 +41,19 @@ export interface PlayerInfo {
   score: number;
 }
 
+export interface PlayerChange {
+  type: 'joined' | 'reconnected';
+  playerName: string;
+  playerId: string;
+}
+
 export interface RoomState {
   roomId: string;
   players: (PlayerInfo | string)[];  // Support both formats for backward compatibility
   phase: GamePhase;
   config: RoomConfig;
   currentSpeaker?: string;
+  change?: PlayerChange;  // Membership change that triggered this update
 }
 
 export interface Round {
@@ -106,6 +113,7 @@ export interface SocketEvents {
   player_left: (data: { playerName: string; playerId: string }) => void;
   left_room: (data: { message: string }) => void;
   player_disconnected: (data: { playerName: string; playerId: string }) => void;
+  players_disconnected: (data: { players: { playerName: string; playerId: string }[] }) => void;
   room_state: (data: RoomState) => void;
   round_start: (data: { roundId: string; phrase: string; speakerName: string; votingChoices?: EmotionChoice[] }) => void;
   speaker_emotion: (data: { roundId: string; emotionId: string; emotionName?: string }) => void;